@@ -1,6 +1,8 @@
 #include <vector>
 #include <cmath>
 #include <algorithm>
+#include <list>
+#include <unordered_map>
 
 struct CarExportData {
     int x, y;
@@ -9,6 +11,11 @@ struct CarExportData {
     int color;
 };
 
+struct CollisionCacheStats {
+    long long hits, misses;
+    int size, capacity;
+};
+
 enum class CarState {
     PLAYING = 0,
     CRASHED = 1,
@@ -26,16 +33,56 @@ struct Vector2D {
     bool equals(const Vector2D& v) const { return x == v.x && y == v.y; }
 };
 
+// 9 прискорень у порядку клавіш KP1..KP9; біт k маски Game_probe_moves - PROBE_ACCELERATIONS[k]
+static const int PROBE_ACCELERATIONS[9][2] = {
+    {-1, 1}, {0, 1}, {1, 1},
+    {-1, 0}, {0, 0}, {1, 0},
+    {-1, -1}, {0, -1}, {1, -1}
+};
+
 struct Segment {
     Vector2D start;
     Vector2D end;
 };
 
+struct MoveKey {
+    int sx, sy, ex, ey;
+    bool operator==(const MoveKey& k) const { return sx == k.sx && sy == k.sy && ex == k.ex && ey == k.ey; }
+};
+
+struct MoveKeyHash {
+    size_t operator()(const MoveKey& k) const {
+        size_t h = (size_t)k.sx * 73856093u;
+        h ^= (size_t)k.sy * 19349663u;
+        h ^= (size_t)k.ex * 83492791u;
+        h ^= (size_t)k.ey * 2654435761u;
+        return h;
+    }
+};
+
 class Track {
 private:
     int width, height;
     std::vector<Segment> walls;
 
+    // Рівномірна сітка: у кожній комірці - індекси стін, чия рамка її перекриває.
+    // Рух перевіряється лише зі стінами з комірок, які перекриває його рамка.
+    static const int CELL_SIZE = 4;
+    int gridW, gridH;
+    std::vector<std::vector<int>> cells;
+    mutable std::vector<unsigned> wallStamp;
+    mutable unsigned queryStamp = 0;
+
+    // LRU-кеш результатів перевірки стін: результат залежить лише від початку й кінця руху.
+    // Очищується при кожній зміні стін.
+    size_t cacheCapacity = 4096;
+    mutable std::list<std::pair<MoveKey, bool>> cacheOrder;
+    mutable std::unordered_map<MoveKey, std::list<std::pair<MoveKey, bool>>::iterator, MoveKeyHash> cacheIndex;
+    mutable long long cacheHits = 0, cacheMisses = 0;
+
+    int cellX(int x) const { return std::max(0, std::min(gridW - 1, x / CELL_SIZE)); }
+    int cellY(int y) const { return std::max(0, std::min(gridH - 1, y / CELL_SIZE)); }
+
     bool onSegment(Vector2D p, Vector2D a, Vector2D b) const {
         return p.x >= std::min(a.x, b.x) && p.x <= std::max(a.x, b.x) &&
             p.y >= std::min(a.y, b.y) && p.y <= std::max(a.y, b.y);
@@ -59,17 +106,70 @@ private:
     }
 
 public:
-    Track(int w, int h) : width(w), height(h) {}
+    Track(int w, int h) : width(w), height(h) {
+        gridW = std::max(1, (w + CELL_SIZE - 1) / CELL_SIZE);
+        gridH = std::max(1, (h + CELL_SIZE - 1) / CELL_SIZE);
+        cells.resize(gridW * gridH);
+    }
     void addWall(int x1, int y1, int x2, int y2) {
+        clearCache();
+        int index = (int)walls.size();
         walls.push_back({ Vector2D(x1, y1), Vector2D(x2, y2) });
+        wallStamp.push_back(0);
+        for (int cy = cellY(std::min(y1, y2)); cy <= cellY(std::max(y1, y2)); ++cy)
+            for (int cx = cellX(std::min(x1, x2)); cx <= cellX(std::max(x1, x2)); ++cx)
+                cells[cy * gridW + cx].push_back(index);
     }
     bool isCollision(Vector2D start, Vector2D end) const {
         if (end.x < 0 || end.x >= width || end.y < 0 || end.y >= height) return true;
-        for (const auto& w : walls) {
-            if (doIntersect(start, end, w.start, w.end)) return true;
+        if (cacheCapacity == 0) return hitsWall(start, end);
+
+        MoveKey key = { start.x, start.y, end.x, end.y };
+        auto found = cacheIndex.find(key);
+        if (found != cacheIndex.end()) {
+            ++cacheHits;
+            cacheOrder.splice(cacheOrder.begin(), cacheOrder, found->second);
+            return found->second->second;
+        }
+        ++cacheMisses;
+        bool hit = hitsWall(start, end);
+        cacheOrder.emplace_front(key, hit);
+        cacheIndex[key] = cacheOrder.begin();
+        if (cacheOrder.size() > cacheCapacity) {
+            cacheIndex.erase(cacheOrder.back().first);
+            cacheOrder.pop_back();
+        }
+        return hit;
+    }
+    bool hitsWall(Vector2D start, Vector2D end) const {
+        // Стіна може лежати в кількох комірках - перевіряємо її один раз за запит
+        if (++queryStamp == 0) {
+            std::fill(wallStamp.begin(), wallStamp.end(), 0);
+            queryStamp = 1;
+        }
+        for (int cy = cellY(std::min(start.y, end.y)); cy <= cellY(std::max(start.y, end.y)); ++cy) {
+            for (int cx = cellX(std::min(start.x, end.x)); cx <= cellX(std::max(start.x, end.x)); ++cx) {
+                for (int index : cells[cy * gridW + cx]) {
+                    if (wallStamp[index] == queryStamp) continue;
+                    wallStamp[index] = queryStamp;
+                    const Segment& w = walls[index];
+                    if (doIntersect(start, end, w.start, w.end)) return true;
+                }
+            }
         }
         return false;
     }
+    void clearCache() {
+        cacheOrder.clear();
+        cacheIndex.clear();
+    }
+    void setCacheCapacity(int capacity) {
+        cacheCapacity = (size_t)std::max(0, capacity);
+        clearCache();
+    }
+    CollisionCacheStats getCacheStats() const {
+        return { cacheHits, cacheMisses, (int)cacheOrder.size(), (int)cacheCapacity };
+    }
 };
 
 class Car {
@@ -109,6 +209,8 @@ class GameSession {
 private:
     std::vector<Car> cars;
     Track currentTrack;
+    // Росте при кожній зміні машин, щоб фронтенд міг не перечитувати незмінний стан
+    unsigned version = 0;
 
     int findCarAtPosition(Vector2D pos, int ignoreIndex) {
         for (size_t i = 0; i < cars.size(); ++i) {
@@ -126,13 +228,19 @@ private:
 public:
     GameSession(int w, int h) : currentTrack(w, h) {}
 
-    void addPlayer(int x, int y, int color) { cars.emplace_back(x, y, color); }
+    void addPlayer(int x, int y, int color) { cars.emplace_back(x, y, color); ++version; }
     void addWallToTrack(int x1, int y1, int x2, int y2) { currentTrack.addWall(x1, y1, x2, y2); }
 
     void resetPlayer(int carIndex, int x, int y) {
-        if (carIndex >= 0 && carIndex < cars.size()) cars[carIndex].reset(Vector2D(x, y));
+        if (carIndex >= 0 && carIndex < cars.size()) {
+            cars[carIndex].reset(Vector2D(x, y));
+            ++version;
+        }
     }
     int getCarCount() const { return (int)cars.size(); }
+    unsigned getVersion() const { return version; }
+    CollisionCacheStats getCollisionCacheStats() const { return currentTrack.getCacheStats(); }
+    void setCollisionCacheCapacity(int capacity) { currentTrack.setCacheCapacity(capacity); }
 
     CarExportData getPlayerExport(int index) const {
         if (index >= 0 && index < cars.size()) {
@@ -142,9 +250,35 @@ public:
         return { 0,0,0,0, -1, 0 };
     }
 
+    int copyPlayerExports(CarExportData* out, int capacity) const {
+        int count = (int)cars.size();
+        for (int i = 0; i < count && i < capacity; ++i) out[i] = getPlayerExport(i);
+        return count;
+    }
+
+    // Маска прискорень, після яких машина не розіб'ється (ні стіни, ні межі, ні інші машини),
+    // без зміни стану сесії. Для неіснуючої або не PLAYING машини - 0
+    unsigned probeMoves(int carIndex) {
+        if (carIndex < 0 || carIndex >= cars.size()) return 0;
+        const Car& car = cars[carIndex];
+        if (car.getState() != (int)CarState::PLAYING) return 0;
+
+        Vector2D currentPos(car.getX(), car.getY());
+        unsigned mask = 0;
+        for (int k = 0; k < 9; ++k) {
+            Vector2D nextPos(car.getX() + car.getVX() + PROBE_ACCELERATIONS[k][0],
+                             car.getY() + car.getVY() + PROBE_ACCELERATIONS[k][1]);
+            if (currentTrack.isCollision(currentPos, nextPos)) continue;
+            if (findCarAtPosition(nextPos, carIndex) != -1) continue;
+            mask |= 1u << k;
+        }
+        return mask;
+    }
+
     void processInput(int carIndex, int dx, int dy) {
         if (carIndex < 0 || carIndex >= cars.size()) return;
         Car& car = cars[carIndex];
+        ++version;
 
         car.accelerate(dx, dy);
 
@@ -177,4 +311,13 @@ extern "C" {
     __declspec(dllexport) CarExportData Game_get_car_data(void* game_ptr, int index) { return ((GameSession*)game_ptr)->getPlayerExport(index); }
     __declspec(dllexport) void Game_update_car(void* game_ptr, int index, int ax, int ay) { ((GameSession*)game_ptr)->processInput(index, ax, ay); }
     __declspec(dllexport) void Game_reset_car(void* game_ptr, int index, int x, int y) { ((GameSession*)game_ptr)->resetPlayer(index, x, y); }
+    __declspec(dllexport) int Game_get_all_car_data(void* game_ptr, CarExportData* out, int capacity) { return ((GameSession*)game_ptr)->copyPlayerExports(out, capacity); }
+    __declspec(dllexport) unsigned Game_get_version(void* game_ptr) { return ((GameSession*)game_ptr)->getVersion(); }
+    __declspec(dllexport) CollisionCacheStats Game_get_collision_cache_stats(void* game_ptr) { return ((GameSession*)game_ptr)->getCollisionCacheStats(); }
+    __declspec(dllexport) void Game_set_collision_cache_capacity(void* game_ptr, int capacity) { ((GameSession*)game_ptr)->setCollisionCacheCapacity(capacity); }
+    __declspec(dllexport) unsigned Game_probe_moves(void* game_ptr, int index) { return ((GameSession*)game_ptr)->probeMoves(index); }
+    // Маски для count пар (сесія, машина) за один виклик
+    __declspec(dllexport) void Game_probe_moves_batch(void** game_ptrs, const int* indices, int count, unsigned* out) {
+        for (int i = 0; i < count; ++i) out[i] = ((GameSession*)game_ptrs[i])->probeMoves(indices[i]);
+    }
 }
\ No newline at end of file
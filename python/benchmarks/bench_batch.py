@@ -0,0 +1,94 @@
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from racetrack.api import bind_native
+from racetrack.batch_sim import BatchSim
+from racetrack.numpy_engine import NumpyEngine
+from racetrack.track_file import read_track, start_positions
+
+
+# Порівняння BatchSim.step з покроковими викликами Game_update_car.
+# Друкує ходи машин за секунду (steps/sec * кількість сесій).
+
+maps_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "maps")
+
+
+def load_engines(dll_path):
+    engines = [("numpy", NumpyEngine())]
+    if dll_path and os.path.exists(dll_path):
+        try: engines.append(("native", bind_native(ctypes.CDLL(dll_path))))
+        except OSError as e: print(f"Skipping native engine: {e}")
+    return engines
+
+
+def bench_per_call(lib, track, starts, n_sessions, steps, rng):
+    width, height = track.size
+    games = []
+    for _ in range(n_sessions):
+        g = lib.Game_new(width, height)
+        for w in track.walls: lib.Game_add_wall(g, *w)
+        for x, y in starts: lib.Game_add_car(g, x, y, 0)
+        games.append(g)
+    actions = rng.integers(-1, 2, size=(steps, n_sessions, 2)).tolist()
+    n_cars = len(starts)
+
+    t = time.perf_counter()
+    for s in range(steps):
+        car = s % n_cars
+        row = actions[s]
+        for g, (ax, ay) in zip(games, row):
+            if lib.Game_get_car_data(g, car).state != 0:
+                lib.Game_reset_car(g, car, *starts[car])
+            lib.Game_update_car(g, car, ax, ay)
+    elapsed = time.perf_counter() - t
+
+    for g in games: lib.Game_delete(g)
+    return steps * n_sessions / elapsed
+
+
+def bench_batch(track, starts, n_sessions, steps, rng):
+    sim = BatchSim.from_track(track, starts, n_sessions)
+    sim.finish = None
+    actions = rng.integers(-1, 2, size=(steps, n_sessions, 2))
+
+    t = time.perf_counter()
+    for s in range(steps):
+        sim.respawn(sim.state != 0)
+        sim.step(actions[s])
+    elapsed = time.perf_counter() - t
+    return steps * n_sessions / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", default=os.path.join(maps_dir, "track1.txt"))
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--dll", default=os.path.join(maps_dir, "..", "bin", "RacetrackEngine.dll"))
+    args = parser.parse_args()
+
+    track = read_track(args.map)
+    starts = start_positions(track.start, args.players)
+    engines = load_engines(args.dll)
+    rng = np.random.default_rng(0)
+
+    print(f"{'sessions':>9} {'engine':>8} {'per-call moves/s':>17} {'batch moves/s':>14} {'speedup':>8}")
+    for n in args.sessions:
+        batch = bench_batch(track, starts, n, args.steps, rng)
+        for name, lib in engines:
+            # Покроковий цикл повільний, тому для великих N менше кроків
+            steps = max(5, min(args.steps, 20000 // n))
+            per_call = bench_per_call(lib, track, starts, n, steps, rng)
+            print(f"{n:>9} {name:>8} {per_call:>17,.0f} {batch:>14,.0f} {batch / per_call:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
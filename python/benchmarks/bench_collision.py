@@ -0,0 +1,102 @@
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from racetrack.api import bind_native
+from racetrack.numpy_engine import Track
+from synth import random_walls, random_moves, map_side_for
+
+
+# Запити колізій за секунду: лінійний перебір стін проти сітки (WallGrid),
+# повторні запити через LRU-кеш, а також нативні збірки (--dll назва=шлях).
+
+def warm_up(track):
+    # Масив стін і сітка Track будуються ліниво при першому запиті - будуємо їх до заміру,
+    # щоб побудова не потрапила в час першого варіанта
+    track.walls
+    track.grid
+
+
+def bench_numpy(track, moves, use_grid, batch):
+    sx, sy, ex, ey = moves
+    t = time.perf_counter()
+    if batch:
+        hits = track.is_collision_many(sx, sy, ex, ey, use_grid=use_grid)
+    else:
+        track.grid_min_walls = 0 if use_grid else sys.maxsize
+        hits = np.array([track.is_collision(a, b, c, d) for a, b, c, d in zip(sx.tolist(), sy.tolist(), ex.tolist(), ey.tolist())])
+    return len(sx) / (time.perf_counter() - t), hits
+
+
+def bench_native(lib, side, walls, moves, cache_capacity=0):
+    # Через processInput: машина з нульовою швидкістю отримує прискорення = рух
+    g = lib.Game_new(side, side)
+    if hasattr(lib, 'Game_set_collision_cache_capacity'):
+        lib.Game_set_collision_cache_capacity(g, cache_capacity)
+    for w in walls.tolist(): lib.Game_add_wall(g, *w)
+    lib.Game_add_car(g, 0, 0, 0)
+    sx, sy, ex, ey = (a.tolist() for a in moves)
+    hits = []
+    t = time.perf_counter()
+    for a, b, c, d in zip(sx, sy, ex, ey):
+        lib.Game_reset_car(g, 0, a, b)
+        lib.Game_update_car(g, 0, c - a, d - b)
+        hits.append(lib.Game_get_car_data(g, 0).state == 1)
+    elapsed = time.perf_counter() - t
+    lib.Game_delete(g)
+    return len(sx) / elapsed, np.array(hits)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--walls", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dll", nargs="*", default=[], help="name=path to a native engine build")
+    args = parser.parse_args()
+
+    natives = []
+    for spec in args.dll:
+        name, _, path = spec.rpartition("=")
+        natives.append((name or os.path.basename(path), bind_native(ctypes.CDLL(path))))
+
+    rng = np.random.default_rng(0)
+    print(f"{'walls':>7} {'engine':>16} {'queries/s':>12}")
+    for n in args.walls:
+        side = map_side_for(n)
+        walls = random_walls(n, side, side, 6, rng)
+        moves = random_moves(args.queries, side, side, 5, rng)
+        track = Track(side, side)
+        for w in walls.tolist(): track.add_wall(*w)
+        warm_up(track)
+        track.set_cache_capacity(0)
+
+        results = []
+        for label, use_grid, batch in [("numpy linear", False, False), ("numpy grid", True, False),
+                                       ("numpy batch lin", False, True), ("numpy batch grid", True, True)]:
+            if batch and not use_grid and n * args.queries > 5e7: continue
+            qps, hits = bench_numpy(track, moves, use_grid, batch)
+            results.append((label, qps, hits))
+
+        # Повторні запити (як у пошуку ШІ та повторах) - друга прохідка йде з LRU-кешу
+        track.set_cache_capacity(args.queries)
+        bench_numpy(track, moves, True, False)
+        qps, hits = bench_numpy(track, moves, True, False)
+        results.append(("numpy cached", qps, hits))
+        for name, lib in natives:
+            qps, hits = bench_native(lib, side, walls, moves)
+            results.append((name, qps, hits))
+
+        reference = results[0][2]
+        for label, qps, hits in results:
+            same = "" if np.array_equal(hits, reference) else "  MISMATCH"
+            print(f"{n:>7} {label:>16} {qps:>12,.0f}{same}")
+
+
+if __name__ == "__main__":
+    main()
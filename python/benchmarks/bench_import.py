@@ -0,0 +1,41 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Час імпорту модулів у свіжому інтерпретаторі (медіана з --runs запусків, мінус голий python).
+# Показує, скільки коштує підключити безголове ядро racetrack порівняно з UI (main.py).
+
+python_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+MODULES = ["racetrack.race", "racetrack.engine", "racetrack.numpy_engine", "racetrack.solver", "main"]
+
+
+def time_import(stmt, runs):
+    env = dict(os.environ, PYTHONPATH=python_dir, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", stmt], env=env, cwd=python_dir, check=True, capture_output=True)
+        times.append(time.perf_counter() - t)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    base = time_import("pass", args.runs)
+    print(f"{'python':>24} {base * 1000:8.1f} ms")
+    for name in args.modules:
+        t = time_import(f"import {name}", args.runs) - base
+        print(f"{name:>24} {t * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import ctypes
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from racetrack.api import ACCELERATIONS, PLAYING, CRASHED, bind_native
+from racetrack.numpy_engine import NumpyEngine
+from racetrack.race import Race
+from racetrack.replay import RaceRecorder, file_sha1, load_replay_track, read_replay, run_replay
+from racetrack.track_file import read_track
+
+
+# Відтворення записаних гонок (replays/*.rtr) без вікна і без затримок:
+# ходів за секунду для кожного рушія і перевірка, що стани машин збігаються із записом.
+# --record N - спершу записати N випадкових гонок на кожній карті (якщо своїх записів немає).
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+maps_dir = os.path.join(root_dir, "maps")
+replays_dir = os.path.join(root_dir, "replays")
+
+
+def record_random_race(lib, map_id, out_path, players, max_turns, rng):
+    map_path = os.path.join(maps_dir, f"track{map_id}.txt")
+    track = read_track(map_path)
+    colors = list(range(players))
+    size = track.size or (32, 24)
+    race = Race(lib, track, colors, size)
+    race.recorder = RaceRecorder(out_path, map_id, file_sha1(map_path), size, race.start_positions, colors)
+    for _ in range(max_turns):
+        if race.winner != -1: break
+        i = race.current_player
+        # Замість 3 секунд очікування - розбита машина або пропускає хід, або вже на старті
+        if race.car(i).state == CRASHED:
+            if rng.random() < 0.5:
+                race.skip_turn()
+                continue
+            race.respawn(i)
+        if race.car(i).state == PLAYING: race.play(*rng.choice(ACCELERATIONS))
+    race.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("replays", nargs="*")
+    parser.add_argument("--record", type=int, default=0, help="record N random races per map first")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=2000, help="turn limit for recorded races")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dll", nargs="*", default=[], help="name=path to a native engine build")
+    args = parser.parse_args()
+
+    paths = args.replays or sorted(glob.glob(os.path.join(replays_dir, "*.rtr")))
+    if args.record:
+        tmp = tempfile.mkdtemp(prefix="racetrack-replays-")
+        rng = random.Random(0)
+        for map_path in sorted(glob.glob(os.path.join(maps_dir, "track*.txt"))):
+            map_id = int(os.path.basename(map_path)[5:-4])
+            for k in range(args.record):
+                out = os.path.join(tmp, f"track{map_id}-{k}.rtr")
+                record_random_race(NumpyEngine(), map_id, out, args.players, args.turns, rng)
+                paths.append(out)
+    if not paths:
+        print(f"No replays in {replays_dir}; use --record N")
+        return
+
+    replays = [read_replay(p) for p in paths]
+    tracks = [load_replay_track(r, maps_dir) for r in replays]
+    total = sum(r.turns for r in replays)
+    print(f"{len(replays)} replays, {total} turns")
+
+    engines = [("numpy", NumpyEngine())]
+    for spec in args.dll:
+        name, _, path = spec.rpartition("=")
+        engines.append((name or os.path.basename(path), bind_native(ctypes.CDLL(path))))
+
+    print(f"{'engine':>12} {'turns/s':>12} {'mismatches':>11}")
+    for name, lib in engines:
+        best, mismatches = 0, 0
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            results = [run_replay(lib, r, tr) for r, tr in zip(replays, tracks)]
+            best = max(best, total / (time.perf_counter() - t))
+            mismatches = sum(len(m) for _, m in results)
+        print(f"{name:>12} {best:>12,.0f} {mismatches:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from racetrack.api import ACCELERATIONS, CRASHED
+from racetrack.race import RESPAWN_DELAY
+from racetrack.server import (CLOSE, DELTA, ERROR, ERROR_MSG, MOVE, MOVE_MSG, OPEN, OPEN_MSG, SESSION_MSG, STATE,
+                              decode_state, frame, split_frames)
+
+
+# Навантажувальний клієнт для racetrack/server.py: --connections з'єднань, на кожному --sessions гонок,
+# у кожній гонці клієнт ходить за всіх машин випадковими прискореннями і чекає дельту перед наступним ходом.
+# Завершена гонка закривається й одразу відкривається нова. Виводить ходів/с і затримку ходу
+# (від надсилання MOVE до дельти з цим ходом) - перцентилі в мілісекундах.
+# Без --port запускає сервер окремим процесом на вільному порту.
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.races = 0
+        self.errors = 0
+        self.deltas = 0
+
+
+class LoadClient(asyncio.Protocol):
+    def __init__(self, args, stats, rng, deadline):
+        self.args = args
+        self.stats = stats
+        self.rng = rng
+        self.deadline = deadline
+        self.buf = bytearray()
+        self.out = []
+        self.races = {}  # сесія -> [ходів, поточний, переможець, машини, час надсилання ходу або None]
+        self.next_request = 0
+        self.transport = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        for _ in range(self.args.sessions): self.open()
+        self.flush()
+
+    def connection_lost(self, exc):
+        if not self.done.done(): self.done.set_result(None)
+
+    def open(self):
+        self.next_request += 1
+        self.out.append(frame(OPEN_MSG.pack(OPEN, self.next_request, self.args.map, self.args.cars)))
+
+    def flush(self):
+        if self.out: self.transport.write(b"".join(self.out))
+        self.out = []
+
+    def data_received(self, data):
+        self.buf += data
+        now = time.perf_counter()
+        for msg in split_frames(self.buf):
+            kind = msg[0]
+            if kind in (STATE, DELTA):
+                self.on_state(decode_state(msg), now)
+            elif kind == ERROR:
+                _, sid, request, code = ERROR_MSG.unpack(msg)
+                self.stats.errors += 1
+                # sid 0 - помилка без сесії (невдалий OPEN із номером request)
+                if sid in self.races: self.races[sid][4] = None
+        self.flush()
+
+    def on_state(self, state, now):
+        kind, sid, turn, current, winner, cars = state
+        race = self.races.get(sid)
+        if race is None:
+            race = self.races[sid] = [turn, current, winner, [None] * self.args.cars, None]
+        if kind == DELTA: self.stats.deltas += 1
+        if race[4] is not None and turn > race[0]:
+            self.stats.latencies.append(now - race[4])
+            race[4] = None
+        race[0], race[1], race[2] = turn, current, winner
+        for i, *c in cars: race[3][i] = c
+        if now >= self.deadline: return
+        if winner != -1:
+            self.stats.races += 1
+            del self.races[sid]
+            self.out.append(frame(SESSION_MSG.pack(CLOSE, sid)))
+            self.open()
+        elif race[4] is None and race[3][current][4] != CRASHED:
+            # Розбиті всі машини - наступну дельту принесе респавн
+            ax, ay = self.rng.choice(ACCELERATIONS)
+            self.out.append(frame(MOVE_MSG.pack(MOVE, sid, current, ax, ay)))
+            race[4] = now
+
+
+def start_server(args):
+    cmd = [sys.executable, "-m", "racetrack.server", "--port", "0", "--engine", args.engine,
+           "--respawn-delay", str(args.respawn_delay)] + (["--dll", args.dll] if args.dll else [])
+    proc = subprocess.Popen(cmd, cwd=os.path.join(root_dir, "python"), stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    while line and not line.startswith("listening on "): line = proc.stdout.readline()
+    if not line: raise RuntimeError("server did not start")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+async def run(args, port):
+    loop = asyncio.get_running_loop()
+    stats = Stats()
+    deadline = time.perf_counter() + args.seconds
+    clients = []
+    for k in range(args.connections):
+        _, client = await loop.create_connection(
+            lambda: LoadClient(args, stats, random.Random(args.seed * 1000 + k), deadline), args.host, port)
+        clients.append(client)
+    t = time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    elapsed = time.perf_counter() - t
+    for c in clients: c.transport.close()
+    await asyncio.gather(*(c.done for c in clients))
+    return stats, elapsed
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, len(values) * q // 100)] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="running server (default: start one)")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=250, help="races per connection")
+    parser.add_argument("--cars", type=int, default=2)
+    parser.add_argument("--map", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--respawn-delay", type=float, default=RESPAWN_DELAY, help="for a server started here")
+    parser.add_argument("--engine", choices=["auto", "native", "numpy"], default="auto", help="for a server started here")
+    parser.add_argument("--dll", help="engine build for a server started here")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    proc = None
+    port = args.port
+    if port is None: proc, port = start_server(args)
+    try:
+        stats, elapsed = asyncio.run(run(args, port))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    lat = sorted(stats.latencies)
+    p50, p95, p99 = (percentile(lat, q) * 1000 for q in (50, 95, 99))
+    moves = len(lat)
+    print(f"{args.connections * args.sessions} concurrent races, {args.cars} cars, {elapsed:.1f} s")
+    print(f"{moves} moves ({moves / elapsed:,.0f} moves/s), {stats.races} races finished, "
+          f"{stats.deltas} deltas, {stats.errors} errors")
+    print(f"move latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {(lat[-1] if lat else 0) * 1000:.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"sessions": args.connections * args.sessions, "cars": args.cars, "seconds": elapsed,
+                       "moves": moves, "moves_per_s": moves / elapsed, "races": stats.races, "errors": stats.errors,
+                       "latency_ms": {"p50": p50, "p95": p95, "p99": p99}}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
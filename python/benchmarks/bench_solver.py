@@ -0,0 +1,65 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from racetrack.solver import Solver
+from racetrack.track_file import read_track, start_positions
+from synth import ring_track
+
+
+# Для кожної карти: побудова полів відстаней (холодна і з кешу на диску),
+# розкриті вузли й час A* від кожної стартової позиції, час plan_move по ходу гонки.
+
+maps_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "maps")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("maps", nargs="*")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--ring", type=int, nargs="*", default=[32, 64, 128], help="synthetic ring track sizes")
+    args = parser.parse_args()
+    paths = args.maps or sorted(glob.glob(os.path.join(maps_dir, "track*.txt")))
+    tracks = [(os.path.basename(p), read_track(p), p) for p in paths]
+    tracks += [(f"ring{side}", ring_track(side), None) for side in args.ring]
+
+    for name, data, path in tracks:
+        t = time.perf_counter()
+        solver = Solver(data)
+        cold = time.perf_counter() - t
+        if path:
+            Solver(data, path)
+            t = time.perf_counter()
+            solver = Solver(data, path)
+            cached = time.perf_counter() - t
+            print(f"{name}: distance fields {cold * 1000:.1f} ms, from disk cache {cached * 1000:.1f} ms")
+        else:
+            print(f"{name}: distance fields {cold * 1000:.1f} ms")
+        if solver.state_dist is None:
+            print("  (state space too large for the exact field, heuristic only)")
+
+        for x, y in start_positions(data.start, args.players):
+            t = time.perf_counter()
+            moves = solver.solve(x, y)
+            elapsed = time.perf_counter() - t
+            turns = len(moves) if moves else "-"
+            print(f"  start ({x:>3},{y:>3}): {turns:>4} turns, {solver.nodes_expanded:>7} nodes, {elapsed * 1000:8.2f} ms")
+
+            # plan_move по ходу гонки (з повторним використанням плану)
+            if not moves: continue
+            state, times = (x, y, 0, 0), []
+            for _ in moves:
+                t = time.perf_counter()
+                ax, ay = solver.plan_move(*state)
+                times.append(time.perf_counter() - t)
+                vx, vy = state[2] + ax, state[3] + ay
+                state = (state[0] + vx, state[1] + vy, vx, vy)
+            print(f"    plan_move: first {times[0] * 1000:.2f} ms, mean {sum(times) / len(times) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
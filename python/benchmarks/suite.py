@@ -0,0 +1,269 @@
+import argparse
+import ctypes
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from racetrack.api import CRASHED, bind_native
+from racetrack.numpy_engine import NumpyEngine, Track
+from racetrack.track_file import read_track, write_track
+from racetrack.trail import Trail
+from bench_collision import bench_native, bench_numpy, warm_up
+from synth import map_side_for, random_moves, random_walls, synthetic_track
+
+
+# Набір бенчмарків гарячих шляхів з результатами в JSON для порівняння між релізами:
+#   collision     - запити колізій/с (Track::isCollision через processInput і NumPy-варіанти)
+#   process_input - ходів/с GameSession::processInput залежно від кількості машин
+#   map_load      - час GameMap.load_from_file (компіляція і з кешу) залежно від кількості стін
+#   render        - час кадру шляху малювання run_game (повний і лише змінені прямокутники)
+#   viewport      - час кадру зі зсувом камери залежно від розміру поля (має не залежати від нього)
+# Вікно - фіктивний драйвер SDL, тож працює без дисплея.
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+SECTIONS = ["collision", "process_input", "map_load", "render", "viewport"]
+
+
+def result(bench, engine, params, value, unit):
+    return {"bench": bench, "engine": engine, "params": params, "value": value, "unit": unit}
+
+
+def bench_collision(engines, wall_counts, queries, rng):
+    out = []
+    for n in wall_counts:
+        side = map_side_for(n)
+        walls = random_walls(n, side, side, 6, rng)
+        moves = random_moves(queries, side, side, 5, rng)
+        track = Track(side, side)
+        for w in walls.tolist(): track.add_wall(*w)
+        warm_up(track)
+        track.set_cache_capacity(0)
+        params = {"walls": n, "queries": queries}
+        for label, use_grid, batch in [("numpy linear", False, False), ("numpy grid", True, False),
+                                       ("numpy batch grid", True, True)]:
+            if not use_grid and n > 10000: continue
+            qps, _ = bench_numpy(track, moves, use_grid, batch)
+            out.append(result("collision", label, params, qps, "queries/s"))
+        for name, lib in engines:
+            qps, _ = bench_native(lib, side, walls, moves)
+            out.append(result("collision", f"{name} processInput", params, qps, "queries/s"))
+    return out
+
+
+def bench_process_input(engines, car_counts, n_walls, moves, rng):
+    # Машини на різних клітинках великої карти ходять по черзі; розбиту повертають на її місце
+    out = []
+    for n_cars in car_counts:
+        side = max(map_side_for(n_walls), int((n_cars * 8) ** 0.5))
+        walls = random_walls(n_walls, side, side, 6, rng).tolist()
+        cells = rng.choice(side * side, n_cars, replace=False)
+        starts = np.stack([cells % side, cells // side], axis=1).tolist()
+        accel = rng.integers(-1, 2, size=(moves, 2)).tolist()
+        for name, lib in engines:
+            g = lib.Game_new(side, side)
+            for w in walls: lib.Game_add_wall(g, *w)
+            for x, y in starts: lib.Game_add_car(g, x, y, 0)
+            t = time.perf_counter()
+            for k, (ax, ay) in enumerate(accel):
+                i = k % n_cars
+                if lib.Game_get_car_data(g, i).state == CRASHED: lib.Game_reset_car(g, i, *starts[i])
+                lib.Game_update_car(g, i, ax, ay)
+            out.append(result("process_input", name, {"cars": n_cars, "walls": n_walls, "moves": moves},
+                              moves / (time.perf_counter() - t), "moves/s"))
+            lib.Game_delete(g)
+    return out
+
+
+def bench_map_load(main, wall_counts, rng, repeat):
+    # Синтетичні карти з картинкою track1.png; cold - з компіляцією кешу, warm - з готового кешу
+    out = []
+    tmp = tempfile.mkdtemp(prefix="racetrack-bench-")
+    try:
+        image = os.path.join(tmp, "bg.png")
+        shutil.copy(os.path.join(root_dir, "maps", "track1.png"), image)
+        for n in wall_counts:
+            path = os.path.join(tmp, f"track_{n}.txt")
+            write_track(path, synthetic_track(n, rng, image=image))
+            params = {"walls": n}
+
+            t = time.perf_counter()
+            read_track(path)
+            out.append(result("map_load", "read_track", params, (time.perf_counter() - t) * 1000, "ms"))
+
+            cold, warm = [], []
+            for _ in range(repeat):
+                cache = os.path.splitext(path)[0] + ".mapcache"
+                if os.path.exists(cache): os.remove(cache)
+                t = time.perf_counter()
+                main.GameMap().load_from_file(path)
+                cold.append(time.perf_counter() - t)
+                t = time.perf_counter()
+                main.GameMap().load_from_file(path)
+                warm.append(time.perf_counter() - t)
+            out.append(result("map_load", "GameMap cold", params, min(cold) * 1000, "ms"))
+            out.append(result("map_load", "GameMap warm", params, min(warm) * 1000, "ms"))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return out
+
+
+def bench_render(main, car_counts, frames, rng):
+    import pygame
+    from racetrack.race import Race
+
+    pygame.init()
+    screen = pygame.display.set_mode((main.WIDTH, main.HEIGHT))
+    font = pygame.font.SysFont("Segoe UI", 24, bold=True)
+    size = (main.WIDTH // main.GRID_SIZE, main.HEIGHT // main.GRID_SIZE)
+    current_map = main.GameMap()
+    current_map.load_from_file(os.path.join(root_dir, "maps", "track1.txt"))
+
+    out = []
+    t = time.perf_counter()
+    static_layer = current_map.get_static_layer(True)
+    out.append(result("render", "static layer", {}, (time.perf_counter() - t) * 1000, "ms"))
+
+    for n_cars in car_counts:
+        # Машини розкидані по полю (частина з них розбита), зі слідами з кількох ходів
+        race = Race(NumpyEngine(), current_map.compiled, [i % len(main.CAR_PALETTE) for i in range(n_cars)], size,
+                    starts=[(int(x), int(y)) for x, y in zip(rng.integers(0, size[0], n_cars), rng.integers(0, size[1], n_cars))])
+        for _ in range(3 * n_cars):
+            if race.winner != -1: break
+            if race.car(race.current_player).state == CRASHED: race.skip_turn()
+            else: race.play(*rng.integers(-1, 2, 2).tolist())
+        now = time.time()
+        race.update_crashes(now)
+        trail_surf = pygame.Surface((main.WIDTH, main.HEIGHT), pygame.SRCALPHA)
+        main.draw_trails(trail_surf, race.trails, [main.trail_color(race.cars[i].color) for i in range(n_cars)])
+        params = {"cars": n_cars, "frames": frames}
+
+        t = time.perf_counter()
+        for _ in range(frames):
+            screen.blit(static_layer, (0, 0))
+            screen.blit(trail_surf, (0, 0))
+            main.draw_cars(screen, font, race, now)
+            main.draw_hud(screen, font, race)
+            pygame.display.flip()
+        out.append(result("render", "full frame", params, (time.perf_counter() - t) / frames * 1000, "ms"))
+
+        rects = []
+        t = time.perf_counter()
+        for _ in range(frames):
+            for r in rects:
+                screen.blit(static_layer, r, r)
+                screen.blit(trail_surf, r, r)
+            prev = rects
+            rects = main.draw_cars(screen, font, race, now) + main.draw_hud(screen, font, race)
+            pygame.display.update(prev + rects)
+        out.append(result("render", "dirty rects", params, (time.perf_counter() - t) / frames * 1000, "ms"))
+        race.close()
+    return out
+
+
+def bench_viewport(main, sides, frames, rng):
+    # Поле side x side*3/4 клітинок з картинкою і стінами; камера щокадру зсувається на 3 клітинки,
+    # тож статичний шар (плитки фону, стіни, сітка) і сліди перебудовуються в кожному кадрі
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((main.WIDTH, main.HEIGHT))
+    out = []
+    tmp = tempfile.mkdtemp(prefix="racetrack-bench-")
+    try:
+        image = os.path.join(tmp, "bg.png")
+        shutil.copy(os.path.join(root_dir, "maps", "track1.png"), image)
+        for side in sides:
+            size = (side, side * 3 // 4)
+            path = os.path.join(tmp, f"track_{side}.txt")
+            write_track(path, synthetic_track(size[0] * size[1] // 16, rng, size, image=image))
+            current_map = main.GameMap()
+            current_map.load_from_file(path)
+            trail = Trail(0, size[1] // 2)
+            for x in range(3, size[0], 3): trail.append(x, size[1] // 2 + x % 2)
+            trail_surf = pygame.Surface((main.WIDTH, main.HEIGHT), pygame.SRCALPHA)
+            step = 3 * main.GRID_SIZE
+            t = time.perf_counter()
+            for k in range(frames):
+                camera = (k * step % max(1, current_map.world_size[0] - main.WIDTH), 0)
+                screen.blit(current_map.get_static_layer(True, camera), (0, 0))
+                main.draw_trails(trail_surf, [trail], [(255, 0, 0, 100)], camera)
+                screen.blit(trail_surf, (0, 0))
+                pygame.display.flip()
+            out.append(result("viewport", "camera move", {"board": f"{size[0]}x{size[1]}", "frames": frames},
+                              (time.perf_counter() - t) / frames * 1000, "ms"))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return out
+
+
+def meta(engines):
+    info = {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "numpy": np.__version__, "engines": [name for name, _ in engines]}
+    try:
+        import pygame
+        info["pygame"] = pygame.version.ver
+    except ImportError: pass
+    try:
+        info["git"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root_dir,
+                                     capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): pass
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", nargs="*", choices=SECTIONS, default=SECTIONS)
+    parser.add_argument("--walls", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--cars", type=int, nargs="+", default=[2, 16, 128, 1024, 4096])
+    parser.add_argument("--render-cars", type=int, nargs="+", default=[2, 4, 64, 512])
+    parser.add_argument("--board", type=int, nargs="+", default=[32, 256, 2048], help="viewport bench map widths")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--dll", nargs="*", default=[], help="name=path to a native engine build")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    engines = [("numpy", NumpyEngine())]
+    for spec in args.dll:
+        name, _, path = spec.rpartition("=")
+        engines.append((name or os.path.basename(path), bind_native(ctypes.CDLL(path))))
+
+    rng = np.random.default_rng(0)
+    results = []
+    if "collision" in args.only:
+        results += bench_collision(engines, args.walls, args.queries, rng)
+    if "process_input" in args.only:
+        results += bench_process_input(engines, args.cars, 1000, args.queries, rng)
+    if {"map_load", "render", "viewport"} & set(args.only):
+        import main as game
+        if "map_load" in args.only: results += bench_map_load(game, args.walls, rng, 3)
+        if "render" in args.only: results += bench_render(game, args.render_cars, args.frames, rng)
+        if "viewport" in args.only: results += bench_viewport(game, args.board, args.frames, rng)
+
+    for r in results:
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"{r['bench']:>14} {r['engine']:>22} {params:<30} {r['value']:>14,.2f} {r['unit']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta(engines), "results": results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
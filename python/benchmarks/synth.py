@@ -0,0 +1,54 @@
+import numpy as np
+
+from racetrack.track_file import TrackData
+
+
+# Генератори синтетичних карт і рухів для бенчмарків.
+
+def random_walls(n, width, height, max_len, rng):
+    x1 = rng.integers(0, width, n)
+    y1 = rng.integers(0, height, n)
+    x2 = np.clip(x1 + rng.integers(-max_len, max_len + 1, n), 0, width - 1)
+    y2 = np.clip(y1 + rng.integers(-max_len, max_len + 1, n), 0, height - 1)
+    return np.stack([x1, y1, x2, y2], axis=1)
+
+
+def random_moves(n, width, height, max_speed, rng):
+    sx = rng.integers(0, width, n)
+    sy = rng.integers(0, height, n)
+    ex = sx + rng.integers(-max_speed, max_speed + 1, n)
+    ey = sy + rng.integers(-max_speed, max_speed + 1, n)
+    return sx, sy, ex, ey
+
+
+def map_side_for(n_walls):
+    # Щільність стін приблизно як у maps/track*.txt (~1 стіна на 20-40 клітинок)
+    return max(32, int((n_walls * 30) ** 0.5))
+
+
+def ring_track(side):
+    # Кільцева траса side x side: старт і фініш розділені перегородкою, тож треба пройти коло
+    lo, hi = 1, side - 2
+    a, b = side // 3, 2 * side // 3
+    mid = side // 2
+    data = TrackData()
+    data.size = (side, side)
+    data.walls = [[lo, lo, hi, lo], [hi, lo, hi, hi], [hi, hi, lo, hi], [lo, hi, lo, lo],
+                  [a, a, b, a], [b, a, b, b], [b, b, a, b], [a, b, a, a],
+                  [mid, b, mid, hi]]
+    lane = hi - b
+    data.start = (mid + 1, b + 1, max(2, lane // 3), lane - 1)
+    data.finish = (mid - 2, b + 1, 1, lane - 1)
+    return data
+
+
+def synthetic_track(n_walls, rng, size=(32, 24), image=None):
+    # Карта розміру вікна гри з n_walls випадковими стінами, стартом зліва і фінішем справа
+    w, h = size
+    data = TrackData()
+    data.size = size
+    data.image = image
+    data.walls = random_walls(n_walls, w, h, 6, rng).tolist()
+    data.start = (1, h // 2 - 2, 2, 4)
+    data.finish = (w - 3, h // 2 - 2, 2, 4)
+    return data
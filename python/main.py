@@ -1,11 +1,23 @@
 import pygame
-import ctypes
+import numpy as np
 import os
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
+from racetrack.api import ACCELERATIONS, PLAYING, CRASHED
+from racetrack.engine import load_engine
+from racetrack.map_cache import load_map
+from racetrack.numpy_engine import WallGrid
+from racetrack.profiler import FrameProfiler, write_report
+from racetrack.race import Race
+from racetrack.replay import RaceRecorder, file_sha1, new_replay_path
+from racetrack.track_file import TrackData
 
-# 1. DLL
+
+# 1. Рушій (DLL або NumPy)
 
 if getattr(sys, 'frozen', False):
     application_path = os.path.dirname(sys.executable)
@@ -17,47 +29,51 @@ current_dir = application_path
 dll_path = os.path.join(current_dir, "..", "bin", "RacetrackEngine.dll")
 assets_dir = os.path.join(current_dir, "..", "assets")
 maps_dir = os.path.join(current_dir, "..", "maps") 
+replays_dir = os.path.join(current_dir, "..", "replays")
 
-# Перевірка наявності DLL
-if not os.path.exists(dll_path):
-    if getattr(sys, 'frozen', False):
-        print(f"CRITICAL ERROR: DLL not found at: {dll_path}")
-        print(f"Make sure 'bin' folder is next to the 'python' folder.")
-        input("Press ENTER to exit...")
-    else:
-        print(f"DLL not found: {dll_path}")
-    sys.exit()
-
-try:
-    lib = ctypes.CDLL(dll_path)
-except OSError as e:
-    print(f"Error loading DLL: {e}")
-    if getattr(sys, 'frozen', False): input("Press ENTER to exit...")
-    sys.exit()
-
-class CarExportData(ctypes.Structure):
-    _fields_ = [("x", ctypes.c_int), ("y", ctypes.c_int),
-                ("vx", ctypes.c_int), ("vy", ctypes.c_int),
-                ("state", ctypes.c_int), ("color", ctypes.c_int)]
-
-lib.Game_new.restype = ctypes.c_void_p
-lib.Game_get_car_data.restype = CarExportData
-lib.Game_get_car_count.restype = ctypes.c_int
-
-lib.Game_new.argtypes = [ctypes.c_int, ctypes.c_int]
-lib.Game_delete.argtypes = [ctypes.c_void_p]
-lib.Game_add_wall.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
-lib.Game_add_car.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
-lib.Game_update_car.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
-lib.Game_get_car_data.argtypes = [ctypes.c_void_p, ctypes.c_int]
-lib.Game_get_car_count.argtypes = [ctypes.c_void_p]
-lib.Game_reset_car.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+# auto - DLL, якщо вона є і завантажується, інакше NumPy; native - тільки DLL; numpy - тільки NumPy
+ENGINE_BACKEND = os.environ.get("RACETRACK_ENGINE", "auto").lower()
+
+# RACETRACK_RECORD=1 - записувати кожну гонку в replays/ для відтворення (racetrack/replay.py);
+# зберігаються останні RACETRACK_REPLAY_KEEP записів
+RECORD_RACES = os.environ.get("RACETRACK_RECORD", "0") != "0"
+REPLAY_KEEP = int(os.environ.get("RACETRACK_REPLAY_KEEP", "50"))
+
+# Рушій завантажується в main(), а не при імпорті - модуль можна імпортувати без DLL
+lib = None
+
+def init_engine():
+    global lib
+    try:
+        lib = load_engine(dll_path, ENGINE_BACKEND)
+    except FileNotFoundError:
+        if getattr(sys, 'frozen', False):
+            print(f"CRITICAL ERROR: DLL not found at: {dll_path}")
+            print(f"Make sure 'bin' folder is next to the 'python' folder.")
+            input("Press ENTER to exit...")
+        else:
+            print(f"DLL not found: {dll_path}")
+        sys.exit()
+    except OSError as e:
+        print(f"Error loading DLL: {e}")
+        if getattr(sys, 'frozen', False): input("Press ENTER to exit...")
+        sys.exit()
+    return lib
 
 
 # 2. Налаштування
 
 GRID_SIZE = 25
 WIDTH, HEIGHT = 800, 600
+THUMB_SIZE = (200, 150)
+
+# Поле карти без SIZE - рівно на вікно; більші карти прокручуються камерою
+DEFAULT_BOARD = (WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE)
+# Фон великої карти зберігається в кеші зменшеним до стількох пікселів
+# і розтягується плитками BG_TILE x BG_TILE, коли плитка потрапляє у вікно
+MAX_BACKGROUND_PIXELS = 4096 * 4096
+BG_TILE = 256
+BG_TILE_CACHE = 64
 
 CAR_PALETTE = [
     (220, 20, 60),   
@@ -76,10 +92,22 @@ COLORS = {
     'TEXT': (255, 255, 255), 'OVERLAY': (0, 0, 0, 230)
 }
 
+# Екран перемальовується лише після подій; поки йде відлік аварії - з цим кроком (с)
+COUNTDOWN_STEP = 0.1
+
 menu_settings = {
     'map_id': 1, 'player_count': 2, 'player_colors': [0, 2, 1, 3]
 }
 
+# Час фаз кадру (racetrack/profiler.py). RACETRACK_PROFILE=файл - міряти з запуску і записати
+# p50/p95/p99 у файл при виході; [P] у меню чи грі - оверлей (вмикає вимірювання)
+PROFILE_PATH = os.environ.get("RACETRACK_PROFILE")
+PROFILE_WINDOW = 120  # оверлей показує перцентилі за стільки останніх кадрів
+
+menu_profiler = FrameProfiler("menu", bool(PROFILE_PATH))
+game_profiler = FrameProfiler("game", bool(PROFILE_PATH))
+show_profiler = False
+
 RULES_TEXT = [
     "--- HOW TO PLAY ---",
     "",
@@ -105,6 +133,40 @@ RULES_TEXT = [
 
 # 3. GUI елементи
 
+class TextCache:
+    # Шрифти за (family, size, bold) завантажуються один раз; відрендерені написи - в LRU
+    # за (шрифт, текст, колір). Поверхні спільні - їх лише blit-ять, не змінюють
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, family, size, bold=False):
+        key = (family, size, bold)
+        f = self.fonts.get(key)
+        if f is None: f = self.fonts[key] = pygame.font.SysFont(family, size, bold=bold)
+        return f
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = self.surfaces[key] = font.render(text, True, color)
+        if len(self.surfaces) > self.capacity: self.surfaces.popitem(last=False)
+        return surf
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+text_cache = TextCache()
+
 class Button:
     def __init__(self, x, y, w, h, text, action=None, color=None):
         self.rect = pygame.Rect(x, y, w, h)
@@ -119,7 +181,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=8)
         pygame.draw.rect(screen, (200,200,200), self.rect, 2, border_radius=8)
         if self.text:
-            txt_surf = font.render(self.text, True, COLORS['TEXT'])
+            txt_surf = text_cache.render(font, self.text, COLORS['TEXT'])
             txt_rect = txt_surf.get_rect(center=self.rect.center)
             screen.blit(txt_surf, txt_rect)
 
@@ -132,75 +194,250 @@ class Button:
             return True
         return False
 
+
+def toggle_profiler():
+    global show_profiler
+    show_profiler = not show_profiler
+    if show_profiler: menu_profiler.enabled = game_profiler.enabled = True
+
+def draw_profiler(screen, profiler):
+    # Таблиця p50/p95/p99 по фазах у правому верхньому куті; повертає її прямокутник.
+    # Цифри змінюються щокадру, тож рядки рендеряться напряму, повз кеш написів
+    profiler_font = text_cache.font("Consolas", 14)
+    lines = [f"{'ms':<8}{'p50':>7}{'p95':>7}{'p99':>7}"]
+    for phase in profiler.samples:
+        p50, p95, p99 = profiler.percentiles(phase, last=PROFILE_WINDOW)
+        lines.append(f"{phase:<8}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+    lines.append(f"{'text':<8}{text_cache.hit_rate():7.1%} hit {len(text_cache.surfaces):>4}")
+    line_h = profiler_font.get_linesize()
+    rect = pygame.Rect(0, 5, profiler_font.size(lines[0])[0] + 10, line_h * len(lines) + 6)
+    rect.right = WIDTH - 5
+    pygame.draw.rect(screen, (0, 0, 0), rect)
+    for i, line in enumerate(lines):
+        screen.blit(profiler_font.render(line, True, (0, 255, 0)), (rect.x + 5, rect.y + 3 + i * line_h))
+    return rect
+
+def background_size(board):
+    # Фон - у пікселях поля (клітинка GRID_SIZE), для великих карт - пропорційно менший
+    w, h = (board or DEFAULT_BOARD)[0] * GRID_SIZE, (board or DEFAULT_BOARD)[1] * GRID_SIZE
+    k = min(1.0, (MAX_BACKGROUND_PIXELS / (w * h)) ** 0.5)
+    return max(1, int(w * k)), max(1, int(h * k))
+
 class GameMap:
     def __init__(self):
         self.start_rect = None
         self.finish_rect = None
         self.walls = [] 
-        self.background_image = None
-
-    def load_from_file(self, filename, game_ptr=None):
-        if not os.path.exists(filename): return False
-        self.walls = []
-        base_path = os.path.dirname(filename)
-        
-        with open(filename, 'r', encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split()
-                if not parts or parts[0].startswith('#'): continue
-                cmd = parts[0]
-                
-                if cmd == 'IMAGE':
-                    img_path = os.path.join(base_path, parts[1])
-                    if os.path.exists(img_path):
-                        self.background_image = pygame.image.load(img_path)
-                        self.background_image = pygame.transform.scale(self.background_image, (WIDTH, HEIGHT))
-                    continue
-
-                try: args = [int(x) for x in parts[1:]]
-                except ValueError: continue
-
-                if cmd == 'START':
-                    self.start_rect = pygame.Rect(args[0]*GRID_SIZE, args[1]*GRID_SIZE, args[2]*GRID_SIZE, args[3]*GRID_SIZE)
-                elif cmd == 'FINISH':
-                    self.finish_rect = pygame.Rect(args[0]*GRID_SIZE, args[1]*GRID_SIZE, args[2]*GRID_SIZE, args[3]*GRID_SIZE)
-                elif cmd == 'WALL' and game_ptr:
-                    lib.Game_add_wall(game_ptr, args[0], args[1], args[2], args[3])
-                    self.walls.append(args)
+        self.board = DEFAULT_BOARD
+        self.world_size = (WIDTH, HEIGHT)
+        self.wall_grid = None
+        self.tiles = OrderedDict()
+        self.static_layers = {}
+        self.compiled = None
+
+    def load_from_file(self, filename):
+        # Карта читається зі скомпільованого кешу (racetrack/map_cache.py), фон - плитками, коли знадобиться
+        compiled = load_map(filename, background_size, THUMB_SIZE)
+        if compiled is None: return False
+        self.compiled = compiled
+        self.board = compiled.size or DEFAULT_BOARD
+        self.world_size = (self.board[0] * GRID_SIZE, self.board[1] * GRID_SIZE)
+        self.tiles = OrderedDict()
+        self.static_layers = {}
+
+        if compiled.start:
+            self.start_rect = pygame.Rect(*(v * GRID_SIZE for v in compiled.start))
+        if compiled.finish:
+            self.finish_rect = pygame.Rect(*(v * GRID_SIZE for v in compiled.finish))
+        self.walls = compiled.walls.tolist()
+        self.wall_grid = None
         return True
 
-    def draw(self, screen, show_walls):
-        if self.background_image: screen.blit(self.background_image, (0, 0))
-        else: screen.fill((255, 255, 255))
-        
+    def walls_in_view(self, camera):
+        # Стіни, чия рамка перетинає вікно, - через сітку стін рушія, без перебору всієї карти
+        if not self.walls: return []
+        if self.wall_grid is None: self.wall_grid = WallGrid(self.compiled.walls.T.astype(np.int64), *self.board)
+        x0, y0 = camera[0] // GRID_SIZE, camera[1] // GRID_SIZE
+        found = self.wall_grid.candidates_one(x0, y0, x0 + WIDTH // GRID_SIZE + 1, y0 + HEIGHT // GRID_SIZE + 1)
+        return [self.walls[i] for i in np.unique(found).tolist()]
+
+    def get_tile(self, tx, ty):
+        # Плитка фону в пікселях поля: найближчі пікселі з memmap кешу, лише для своєї ділянки
+        tile = self.tiles.get((tx, ty))
+        if tile:
+            self.tiles.move_to_end((tx, ty))
+            return tile
+        bg = self.compiled.background
+        ww, wh = self.world_size
+        x0, y0 = tx * BG_TILE, ty * BG_TILE
+        x1, y1 = min(x0 + BG_TILE, ww), min(y0 + BG_TILE, wh)
+        if bg.shape[:2] == (wh, ww):
+            pixels = bg[y0:y1, x0:x1]
+        else:
+            xs = np.arange(x0, x1) * bg.shape[1] // ww
+            ys = np.arange(y0, y1) * bg.shape[0] // wh
+            pixels = bg[ys[0]:ys[-1] + 1, xs[0]:xs[-1] + 1][ys - ys[0]][:, xs - xs[0]]
+        tile = pygame.image.frombuffer(np.ascontiguousarray(pixels).tobytes(), (x1 - x0, y1 - y0), self.compiled.pixel_format)
+        self.tiles[(tx, ty)] = tile
+        if len(self.tiles) > BG_TILE_CACHE: self.tiles.popitem(last=False)
+        return tile
+
+    def get_static_layer(self, show_walls, camera=(0, 0)):
+        # Фон, зони старту/фінішу, стіни і сітка у вікні не змінюються, поки стоїть камера -
+        # збираємо один раз на положення камери, лише з того, що потрапляє у вікно
+        cached = self.static_layers.get(show_walls)
+        if cached and cached[0] == camera: return cached[1]
+
+        cx, cy = camera
+        ww, wh = self.world_size
+        view = pygame.Rect(0, 0, WIDTH, HEIGHT)
+        world = pygame.Rect(-cx, -cy, ww, wh).clip(view)
+        layer = pygame.Surface((WIDTH, HEIGHT))
+        if world != view: layer.fill(COLORS['BG'])
+        if self.compiled and self.compiled.has_image:
+            layer.fill((0, 0, 0), world)
+            for ty in range((cy + world.y) // BG_TILE, (cy + world.bottom - 1) // BG_TILE + 1):
+                for tx in range((cx + world.x) // BG_TILE, (cx + world.right - 1) // BG_TILE + 1):
+                    layer.blit(self.get_tile(tx, ty), (tx * BG_TILE - cx, ty * BG_TILE - cy))
+        else: layer.fill((255, 255, 255), world)
+
         s = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        if self.start_rect: pygame.draw.rect(s, (0, 255, 0, 50), self.start_rect)
-        if self.finish_rect: pygame.draw.rect(s, (255, 255, 0, 50), self.finish_rect)
-        screen.blit(s, (0,0))
+        if self.start_rect: pygame.draw.rect(s, (0, 255, 0, 50), self.start_rect.move(-cx, -cy))
+        if self.finish_rect: pygame.draw.rect(s, (255, 255, 0, 50), self.finish_rect.move(-cx, -cy))
+        layer.blit(s, (0,0))
 
         if show_walls:
-            for w in self.walls:
-                pygame.draw.line(screen, (255, 0, 0), (w[0]*GRID_SIZE, w[1]*GRID_SIZE), (w[2]*GRID_SIZE, w[3]*GRID_SIZE), 2)
+            for w in self.walls_in_view(camera):
+                pygame.draw.line(layer, (255, 0, 0), (w[0]*GRID_SIZE - cx, w[1]*GRID_SIZE - cy), (w[2]*GRID_SIZE - cx, w[3]*GRID_SIZE - cy), 2)
+
+        # Лінії сітки лише у вікні
+        top, bottom = world.y, world.bottom
+        for x in range(-(-(cx + world.x) // GRID_SIZE) * GRID_SIZE, cx + world.right, GRID_SIZE):
+            pygame.draw.line(layer, COLORS['GRID'], (x - cx, top), (x - cx, bottom), 1)
+        for y in range(-(-(cy + world.y) // GRID_SIZE) * GRID_SIZE, cy + world.bottom, GRID_SIZE):
+            pygame.draw.line(layer, COLORS['GRID'], (world.x, y - cy), (world.right, y - cy), 1)
+
+        if pygame.display.get_surface(): layer = layer.convert()
+        self.static_layers[show_walls] = (camera, layer)
+        return layer
+
+    def draw(self, screen, show_walls, camera=(0, 0)):
+        screen.blit(self.get_static_layer(show_walls, camera), (0, 0))
+
+
+def follow_camera(camera, world_size, car):
+    # Камера тримає машину в середній половині вікна, інакше центрується на ній;
+    # по осі, де поле не більше за вікно, камера стоїть на 0
+    x, y = car.x * GRID_SIZE, car.y * GRID_SIZE
+    cx, cy = camera
+    if not cx + WIDTH // 4 <= x < cx + WIDTH * 3 // 4: cx = x - WIDTH // 2
+    if not cy + HEIGHT // 4 <= y < cy + HEIGHT * 3 // 4: cy = y - HEIGHT // 2
+    return (max(0, min(cx, world_size[0] - WIDTH)), max(0, min(cy, world_size[1] - HEIGHT)))
+
+
+def wait_events(timeout=None):
+    # Спить, доки не прийде подія або не мине timeout (с); повертає всі події з черги
+    if timeout is None: first = pygame.event.wait()
+    else: first = pygame.event.wait(max(1, int(timeout * 1000)))
+    if first.type == pygame.NOEVENT: return []
+    return [first] + pygame.event.get()
 
 
 # 4. Меню
 
-map_thumbnails = {} 
-def get_map_thumbnail(map_id):
-    if map_id in map_thumbnails: return map_thumbnails[map_id]
-    temp_map = GameMap()
+def make_map_thumbnail(map_id):
     path = os.path.join(maps_dir, f"track{map_id}.txt")
-    temp_map.load_from_file(path)
-    if temp_map.background_image:
-        thumb = pygame.transform.scale(temp_map.background_image, (200, 150))
+    compiled = load_map(path, background_size, THUMB_SIZE)
+    if compiled and compiled.has_image:
+        # Копія: пікселі з кешу лише для читання, а рамка малюється поверх
+        thumb = pygame.image.frombuffer(compiled.thumbnail, THUMB_SIZE, compiled.pixel_format).copy()
         pygame.draw.rect(thumb, (255,255,255), (0,0,200,150), 4)
     else:
         thumb = pygame.Surface((200, 150))
         thumb.fill((100, 100, 100))
-    map_thumbnails[map_id] = thumb
     return thumb
 
+def find_maps():
+    # Номери карт track1.txt, track2.txt, ... до першого пропуску - одним читанням папки
+    try: names = set(os.listdir(maps_dir))
+    except OSError: return []
+    ids = []
+    while f"track{len(ids) + 1}.txt" in names: ids.append(len(ids) + 1)
+    return ids
+
+# Подія: фонова задача підготувала мініатюру або список карт (меню перемальовується)
+THUMB_READY = pygame.event.custom_type()
+
+class ThumbnailCache:
+    # Мініатюри готуються в пулі потоків; поки мініатюри немає, get() повертає заглушку.
+    # Готові зберігаються в LRU на capacity штук. Невдале завантаження не кешується:
+    # карта пробується знову через retry_delay секунд, тоді ж меню отримує THUMB_READY.
+    def __init__(self, capacity=64, workers=4, retry_delay=2.0):
+        self.capacity = capacity
+        self.retry_delay = retry_delay
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.thumbs = OrderedDict()
+        self.pending = set()
+        self.retry_at = {}  # номер карти -> коли пробувати знову після помилки
+        self.retry_timers = {}
+        self.placeholder = pygame.Surface((200, 150))
+        self.placeholder.fill((70, 70, 70))
+
+    def discover(self):
+        # Future зі списком карт; мініатюри перших capacity карт одразу ставляться в чергу
+        return self.pool.submit(self._discover)
+
+    def _discover(self):
+        ids = find_maps()
+        for map_id in ids[:self.capacity]: self.get(map_id)
+        self._notify(None)
+        return ids
+
+    def get(self, map_id):
+        with self.lock:
+            thumb = self.thumbs.get(map_id)
+            if thumb is not None:
+                self.thumbs.move_to_end(map_id)
+                return thumb
+            if map_id not in self.pending and time.monotonic() >= self.retry_at.get(map_id, 0):
+                self.pending.add(map_id)
+                self.pool.submit(self._load, map_id)
+        return self.placeholder
+
+    def _load(self, map_id):
+        try: thumb = make_map_thumbnail(map_id)
+        except (OSError, ValueError, pygame.error): thumb = None
+        with self.lock:
+            self.pending.discard(map_id)
+            if thumb is None:
+                self.retry_at[map_id] = time.monotonic() + self.retry_delay
+                # Меню спить до наступної події - будимо його, коли карту можна пробувати знову
+                timer = self.retry_timers[map_id] = threading.Timer(self.retry_delay, self._notify, (map_id,))
+                timer.daemon = True
+                timer.start()
+                return
+            self.retry_at.pop(map_id, None)
+            self.retry_timers.pop(map_id, None)
+            self.thumbs[map_id] = thumb
+            while len(self.thumbs) > self.capacity: self.thumbs.popitem(last=False)
+        self._notify(map_id)
+
+    def close(self):
+        # Завантаження, що вже почалися, мають завершитися до pygame.quit(); решта скасовується
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for timer in self.retry_timers.values(): timer.cancel()
+
+    def _notify(self, map_id):
+        try: pygame.event.post(pygame.event.Event(THUMB_READY, map_id=map_id))
+        except pygame.error: pass
+
+# Створюється в першому run_menu (після pygame.init), живе між заходами в меню
+map_thumbnails = None
+
 def run_menu(screen, font):
+    global map_thumbnails
+    if map_thumbnails is None: map_thumbnails = ThumbnailCache()
     clock = pygame.time.Clock()
     menu_state = 'MAIN'
     
@@ -219,26 +456,31 @@ def run_menu(screen, font):
     
     btn_back = Button(300, 540, 200, 40, "BACK", back_to_main)
 
-    available_maps = []
-    i = 1
-    while os.path.exists(os.path.join(maps_dir, f"track{i}.txt")):
-        available_maps.append(i)
-        i += 1
+    # Пошук карт і мініатюри - у фонових потоках, меню малюється одразу
+    maps_future = map_thumbnails.discover()
+
+    title_font = text_cache.font("Segoe UI", 40, bold=True)
+    rules_font = text_cache.font("Consolas", 18)
 
-    title_font = pygame.font.SysFont("Segoe UI", 40, bold=True)
-    rules_font = pygame.font.SysFont("Consolas", 18)
+    # Після кадру з подіями малюється ще один (кліки змінюють стан уже після малювання),
+    # далі меню чекає на наступну подію
+    settle = True
 
     while True:
+        events = pygame.event.get() if settle else wait_events()
+        settle = bool(events)
+        menu_profiler.start_frame()
         screen.fill(COLORS['UI_BG'])
         mouse_pos = pygame.mouse.get_pos()
-        events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT: return False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p: toggle_profiler()
+        menu_profiler.mark("events")
 
         if menu_state == 'MAIN':
-            title = title_font.render("RACETRACK", True, (255, 215, 0))
+            title = text_cache.render(title_font, "RACETRACK", (255, 215, 0))
             screen.blit(title, (400 - title.get_width()//2, 30))
-            thumb = get_map_thumbnail(menu_settings['map_id'])
+            thumb = map_thumbnails.get(menu_settings['map_id'])
             screen.blit(thumb, (300, 70))
             pygame.draw.rect(screen, (255,255,255), (300, 70, 200, 150), 2)
             
@@ -258,7 +500,7 @@ def run_menu(screen, font):
                         if rect.collidepoint(mouse_pos):
                              menu_settings['player_colors'][i] = (menu_settings['player_colors'][i] + 1) % len(CAR_PALETTE)
 
-            lbl_pl = font.render(f"Players: {menu_settings['player_count']}", True, COLORS['TEXT'])
+            lbl_pl = text_cache.render(font, f"Players: {menu_settings['player_count']}", COLORS['TEXT'])
             screen.blit(lbl_pl, (400 - lbl_pl.get_width()//2, 320))
             pc = menu_settings['player_count']
             start_x = 400 - (pc * 70) // 2
@@ -273,7 +515,7 @@ def run_menu(screen, font):
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
             overlay.fill(COLORS['OVERLAY'])
             screen.blit(overlay, (0,0))
-            title = font.render("SELECT A MAP", True, (255, 255, 255))
+            title = text_cache.render(font, "SELECT A MAP", (255, 255, 255))
             screen.blit(title, (400 - title.get_width()//2, 50))
             start_x, start_y = 50, 100
             padding = 20
@@ -282,12 +524,15 @@ def run_menu(screen, font):
                 if event.type == pygame.MOUSEBUTTONDOWN: clicked = True
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE: menu_state = 'MAIN'
 
+            available_maps = maps_future.result() if maps_future.done() else []
             for idx, map_id in enumerate(available_maps):
                 col = idx % 3
                 row = idx // 3
                 x = start_x + col * (220 + padding)
                 y = start_y + row * (170 + padding)
-                thumb = get_map_thumbnail(map_id)
+                # Карти нижче вікна не видно - їхні мініатюри не потрібні (і не витісняють видимі з LRU)
+                if y >= HEIGHT: break
+                thumb = map_thumbnails.get(map_id)
                 rect = pygame.Rect(x, y, 220, 170)
                 if rect.collidepoint(mouse_pos):
                     pygame.draw.rect(screen, (255, 215, 0), (x-5, y-5, 230, 180), border_radius=10)
@@ -295,7 +540,7 @@ def run_menu(screen, font):
                         menu_settings['map_id'] = map_id
                         menu_state = 'MAIN'
                 screen.blit(thumb, (x+10, y+10))
-                name = font.render(f"Map {map_id}", True, (255,255,255))
+                name = text_cache.render(font, f"Map {map_id}", (255,255,255))
                 screen.blit(name, (x + 110 - name.get_width()//2, y + 175))
 
             btn_back.check_hover(mouse_pos)
@@ -312,7 +557,7 @@ def run_menu(screen, font):
             y_offset = 50
             for line in RULES_TEXT:
                 color = (255, 215, 0) if line.startswith("---") or (len(line)>0 and line[0].isdigit()) else (220, 220, 220)
-                txt_surf = rules_font.render(line, True, color)
+                txt_surf = text_cache.render(rules_font, line, color)
                 screen.blit(txt_surf, (140, y_offset))
                 y_offset += 25
 
@@ -323,12 +568,93 @@ def run_menu(screen, font):
                     if btn_back.check_click(mouse_pos): pass
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE: menu_state = 'MAIN'
 
+        menu_profiler.mark("draw")
+        if show_profiler:
+            draw_profiler(screen, menu_profiler)
+            menu_profiler.mark("overlay")
         pygame.display.flip()
+        menu_profiler.mark("flip")
+        menu_profiler.end_frame()
         clock.tick(60)
 
 
 # 5. Гра(звуки)
 
+def trail_color(color_id):
+    safe_col_idx = color_id if color_id < len(CAR_PALETTE) else 0
+    base_col = CAR_PALETTE[safe_col_idx]
+    return (base_col[0], base_col[1], base_col[2], 100)
+
+def draw_trails(surf, car_trails, colors, camera=(0, 0)):
+    # Сліди (racetrack/trail.py) переводяться в пікселі одним масивом; малюються лише відрізки,
+    # чия рамка потрапляє у вікно, - шматками суцільних ліній
+    surf.fill((0, 0, 0, 0))
+    for i, trail in enumerate(car_trails):
+        if len(trail) < 2: continue
+        pts = trail.as_array().astype(np.int64) * GRID_SIZE - camera
+        lo, hi = np.minimum(pts[:-1], pts[1:]), np.maximum(pts[:-1], pts[1:])
+        visible = (hi[:, 0] >= -4) & (lo[:, 0] < WIDTH + 4) & (hi[:, 1] >= -4) & (lo[:, 1] < HEIGHT + 4)
+        # Межі шматків: відрізки visible[a:b] видимі підряд -> точки pts[a:b + 1]
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], visible, [False]))))
+        for a, b in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+            pygame.draw.lines(surf, colors[i], False, pts[a:b + 1].tolist(), 4)
+        inside = (pts[:, 0] >= -4) & (pts[:, 0] < WIDTH + 4) & (pts[:, 1] >= -4) & (pts[:, 1] < HEIGHT + 4)
+        for p in pts[inside].tolist(): pygame.draw.circle(surf, colors[i], p, 3)
+
+def draw_trail_step(surf, path, col, camera=(0, 0)):
+    # Домальовує останній відрізок сліду; повертає змінений прямокутник
+    a = (path[-2][0]*GRID_SIZE - camera[0], path[-2][1]*GRID_SIZE - camera[1])
+    b = (path[-1][0]*GRID_SIZE - camera[0], path[-1][1]*GRID_SIZE - camera[1])
+    rect = pygame.draw.line(surf, col, a, b, 4)
+    if len(path) == 2: rect.union_ip(pygame.draw.circle(surf, col, a, 3))
+    rect.union_ip(pygame.draw.circle(surf, col, b, 3))
+    return rect
+
+def draw_cars(screen, font, race, now, camera=(0, 0)):
+    # Машини і таймери респавну у вікні; повертає змінені прямокутники
+    rects = []
+    cars = race.cars
+    view = pygame.Rect(-40, -40, WIDTH + 80, HEIGHT + 80)
+    for i in range(race.total_players):
+        d = cars[i]
+        sx, sy = d.x * GRID_SIZE - camera[0], d.y * GRID_SIZE - camera[1]
+        if not view.collidepoint(sx, sy) and not view.collidepoint(sx + d.vx*GRID_SIZE, sy + d.vy*GRID_SIZE): continue
+        safe_col_idx = d.color if d.color < len(CAR_PALETTE) else 0
+        col = CAR_PALETTE[safe_col_idx]
+        
+        if d.state == CRASHED: 
+            rects.append(pygame.draw.line(screen, (100,100,100), (sx-8, sy-8), (sx+8, sy+8), 3))
+            rects.append(pygame.draw.line(screen, (100,100,100), (sx-8, sy+8), (sx+8, sy-8), 3))
+            
+            remaining = race.respawn_remaining(i, now)
+            if remaining is not None:
+                t_surf = text_cache.render(font, f"{remaining:.1f}", (255, 0, 0))
+                rects.append(screen.blit(t_surf, (sx - 10, sy - 30)))
+        else:
+            rects.append(pygame.draw.circle(screen, col, (sx, sy), 7))
+            rects.append(pygame.draw.line(screen, col, (sx, sy), (sx + d.vx*GRID_SIZE, sy + d.vy*GRID_SIZE), 2))
+            rects.append(pygame.draw.circle(screen, col, (sx + d.vx*GRID_SIZE, sy + d.vy*GRID_SIZE), 3))
+    return rects
+
+def draw_move_hints(screen, race, camera=(0, 0)):
+    # Куди потрапить поточна машина з кожним із 9 прискорень: зелене - безпечно, червоне - аварія
+    mask = race.probe_moves()
+    if mask is None: return []
+    d = race.car(race.current_player)
+    if d.state != PLAYING: return []
+    rects = []
+    for k, (ax, ay) in enumerate(ACCELERATIONS):
+        sx = (d.x + d.vx + ax) * GRID_SIZE - camera[0]
+        sy = (d.y + d.vy + ay) * GRID_SIZE - camera[1]
+        col = (0, 200, 0) if mask >> k & 1 else (220, 0, 0)
+        rects.append(pygame.draw.circle(screen, col, (sx, sy), 4, 2))
+    return rects
+
+def draw_hud(screen, font, race):
+    txt = text_cache.render(font, f"Player {race.current_player+1}'s Turn | [ESC]-Menu", (0,0,0))
+    return [pygame.draw.rect(screen, (255,255,255), (5,5, txt.get_width()+10, 30)),
+            screen.blit(txt, (10, 10))]
+
 def run_game(screen, font):
     try:
         snd_crash = pygame.mixer.Sound(os.path.join(assets_dir, "crash.wav"))
@@ -340,66 +666,62 @@ def run_game(screen, font):
         snd_win = None
         snd_move = None
 
-    game_ptr = lib.Game_new(WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE)
     current_map = GameMap()
     map_file = f"track{menu_settings['map_id']}.txt"
     map_path = os.path.join(maps_dir, map_file)
-    current_map.load_from_file(map_path, game_ptr)
-
-    # Визначення стартових позицій
-    center_x, center_y = 2, 2
-    rect_w, rect_h = 4, 4
-    if current_map.start_rect:
-        center_x = (current_map.start_rect.x + current_map.start_rect.w/2) / GRID_SIZE
-        center_y = (current_map.start_rect.y + current_map.start_rect.h/2) / GRID_SIZE
-        rect_w = current_map.start_rect.w / GRID_SIZE
-        rect_h = current_map.start_rect.h / GRID_SIZE
-
-    count = menu_settings['player_count']
-    start_positions = []
-    
-    # Розташування машин
-    is_horizontal_start = rect_w >= rect_h 
-    spacing = 2.0 
-
-    for i in range(count):
-        offset = (i - (count - 1) / 2.0) * spacing
-        if is_horizontal_start:
-            start_x = int(center_x + offset)
-            start_y = int(center_y)
-        else:
-            start_x = int(center_x)
-            start_y = int(center_y + offset)
-        lib.Game_add_car(game_ptr, start_x, start_y, menu_settings['player_colors'][i])
-        start_positions.append((start_x, start_y))
-
-    total_players = lib.Game_get_car_count(game_ptr)
-    current_player = 0
-    car_trails = [ [] for _ in range(total_players) ]
-    crash_timers = {} 
-    
-    for i in range(total_players):
-        d = lib.Game_get_car_data(game_ptr, i)
-        car_trails[i].append((d.x, d.y))
+    current_map.load_from_file(map_path)
+
+    # Правила гонки - у racetrack/race.py; тут лише ввід, звуки й малювання
+    colors = menu_settings['player_colors'][:menu_settings['player_count']]
+    race = Race(lib, current_map.compiled or TrackData(), colors, current_map.board)
+    if RECORD_RACES and current_map.compiled:
+        try:
+            replay_path = new_replay_path(replays_dir, REPLAY_KEEP)
+            race.recorder = RaceRecorder(replay_path, menu_settings['map_id'], file_sha1(map_path),
+                                         current_map.board, race.start_positions, colors)
+        except OSError as e:
+            print(f"Race recording disabled: {e}")
+    cars = race.cars
+    total_players = race.total_players
 
     show_debug_walls = False
+    show_move_hints = False
     running = True
-    winner_id = -1
     clock = pygame.time.Clock()
 
+    drawn_static = None
+    trail_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    trail_colors = [trail_color(cars[i].color) for i in range(total_players)]
+    trails_dirty = False
+    trail_rects = []
+    full_redraw = True
+    dirty_rects = []
+    # Камера - лівий верхній кут вікна в пікселях поля; стежить за поточним гравцем
+    camera = follow_camera((0, 0), current_map.world_size, race.car(0))
+    # Гра покрокова: цикл спить до натискання або до наступного кроку відліку аварії.
+    # wake - у кадрі щось змінилося без вводу, наступний кадр потрібен одразу
+    wake = True
+    prof = game_profiler
+
     while running:
         move = None
-        events = pygame.event.get()
+        # Кроки відліку рахуються від моменту аварії, тож останній збігається з респавном
+        timeout = race.next_timer_step(time.time(), COUNTDOWN_STEP)
+        events = pygame.event.get() if wake else wait_events(timeout)
+        wake = False
+        prof.start_frame()
         for event in events:
             if event.type == pygame.QUIT: 
-                lib.Game_delete(game_ptr)
+                race.close()
                 return "QUIT"
             if event.type == pygame.KEYDOWN:
-                if winner_id != -1: running = False
+                if race.winner != -1: running = False
                 if event.key == pygame.K_ESCAPE: running = False 
                 if event.key == pygame.K_h: show_debug_walls = not show_debug_walls
+                if event.key == pygame.K_p: toggle_profiler()
+                if event.key == pygame.K_m: show_move_hints = not show_move_hints
                 
-                if winner_id == -1:
+                if race.winner == -1:
                     if event.key in [pygame.K_UP, pygame.K_KP8]: move = (0, -1)
                     elif event.key in [pygame.K_DOWN, pygame.K_KP2]: move = (0, 1)
                     elif event.key in [pygame.K_LEFT, pygame.K_KP4]: move = (-1, 0)
@@ -409,117 +731,118 @@ def run_game(screen, font):
                     elif event.key == pygame.K_KP9: move = (1, -1)
                     elif event.key == pygame.K_KP1: move = (-1, 1)
                     elif event.key == pygame.K_KP3: move = (1, 1)
+        prof.mark("events")
 
-        if winner_id == -1:
-            p_data = lib.Game_get_car_data(game_ptr, current_player)
-            if move and p_data.state == 0:
-                lib.Game_update_car(game_ptr, current_player, move[0], move[1])
-                new_d = lib.Game_get_car_data(game_ptr, current_player)
+        if race.winner == -1:
+            player = race.current_player
+            p_data = race.car(player)
+            if move and p_data.state == PLAYING:
+                new_d = race.play(move[0], move[1])
                 
-                if new_d.state == 1:
+                if new_d.state == CRASHED:
                     if snd_crash: snd_crash.play()
                 else:
                     if snd_move: snd_move.play()
-
-                car_pixel_x = new_d.x * GRID_SIZE
-                car_pixel_y = new_d.y * GRID_SIZE
-                car_point = (car_pixel_x, car_pixel_y)
-                
-                if current_map.finish_rect and current_map.finish_rect.collidepoint(car_point):
-                    winner_id = current_player
+                if race.winner != -1:
                     if snd_win: snd_win.play()
+                    # Екран перемоги малюється одним повним кадром
+                    full_redraw = True
+                prof.mark("engine")
                 
-                car_trails[current_player].append((new_d.x, new_d.y))
-                if winner_id == -1:
-                    current_player = (current_player + 1) % total_players
+                trail_rects.append(draw_trail_step(trail_surf, race.trails[player], trail_colors[player], camera))
+                prof.mark("trails")
             
-            elif p_data.state == 1: 
-                 current_player = (current_player + 1) % total_players
-
-        screen.fill(COLORS['GRID'])
-        current_map.draw(screen, show_debug_walls)
-
-        for x in range(0, WIDTH, GRID_SIZE):
-            pygame.draw.line(screen, COLORS['GRID'], (x, 0), (x, HEIGHT), 1)
-        for y in range(0, HEIGHT, GRID_SIZE):
-            pygame.draw.line(screen, COLORS['GRID'], (0, y), (WIDTH, y), 1)
-
-        trail_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        for i, path in enumerate(car_trails):
-            if len(path) > 1:
-                d = lib.Game_get_car_data(game_ptr, i)
-                safe_col_idx = d.color if d.color < len(CAR_PALETTE) else 0
-                base_col = CAR_PALETTE[safe_col_idx]
-                trail_col = (base_col[0], base_col[1], base_col[2], 100)
-                pixel_points = [(p[0]*GRID_SIZE, p[1]*GRID_SIZE) for p in path]
-                pygame.draw.lines(trail_surf, trail_col, False, pixel_points, 4)
-                for p in pixel_points: pygame.draw.circle(trail_surf, trail_col, p, 3)
-        screen.blit(trail_surf, (0,0))
-
+            elif p_data.state == CRASHED: 
+                 race.skip_turn()
+                 wake = True
+        prof.mark("engine")
+
+        # Статичний шар і сліди перемальовуються повністю лише коли змінюються;
+        # в інших кадрах оновлюються тільки прямокутники навколо машин, таймерів і HUD
+        new_camera = follow_camera(camera, current_map.world_size, race.car(race.current_player))
+        if new_camera != camera:
+            camera = new_camera
+            trails_dirty = True
+        static_layer = current_map.get_static_layer(show_debug_walls, camera)
+        if static_layer is not drawn_static:
+            drawn_static = static_layer
+            full_redraw = True
+        prof.mark("static")
+        if trails_dirty:
+            # Повна перебудова лише після респавну і зсуву камери; звичайний хід домальовує один відрізок
+            draw_trails(trail_surf, race.trails, trail_colors, camera)
+            trails_dirty = False
+            full_redraw = True
+        prof.mark("trails")
+
+        if race.winner != -1 and not full_redraw:
+            clock.tick(60)
+            continue
+
+        if full_redraw:
+            screen.blit(static_layer, (0, 0))
+            screen.blit(trail_surf, (0, 0))
+        else:
+            for r in dirty_rects + trail_rects:
+                screen.blit(static_layer, r, r)
+                screen.blit(trail_surf, r, r)
+        prev_rects = dirty_rects + trail_rects
+        dirty_rects = []
+        trail_rects = []
+        prof.mark("blit")
+
+        # Машини малюються в стані до респавну (update_crashes оновлює знімок cars до респавну, а не після);
+        # респавнені з'являться на старті в наступному кадрі
         current_time = time.time()
-        for i in range(total_players):
-            d = lib.Game_get_car_data(game_ptr, i)
-            sx, sy = d.x * GRID_SIZE, d.y * GRID_SIZE
-            safe_col_idx = d.color if d.color < len(CAR_PALETTE) else 0
-            col = CAR_PALETTE[safe_col_idx]
-            
-            if d.state == 1: 
-                pygame.draw.line(screen, (100,100,100), (sx-8, sy-8), (sx+8, sy+8), 3)
-                pygame.draw.line(screen, (100,100,100), (sx-8, sy+8), (sx+8, sy-8), 3)
-                
-                if winner_id == -1:
-                    if i not in crash_timers: crash_timers[i] = current_time
-                    elapsed = current_time - crash_timers[i]
-                    remaining = 3.0 - elapsed
-                    if remaining <= 0:
-                        try:
-                            rx, ry = start_positions[i]
-                            lib.Game_reset_car(game_ptr, i, rx, ry)
-                            del crash_timers[i]
-                            car_trails[i] = [(rx, ry)] 
-                        except AttributeError: pass
-                    else:
-                        t_surf = font.render(f"{remaining:.1f}", True, (255, 0, 0))
-                        screen.blit(t_surf, (sx - 10, sy - 30))
-            else:
-                if i in crash_timers: del crash_timers[i]
-                pygame.draw.circle(screen, col, (sx, sy), 7)
-                pygame.draw.line(screen, col, (sx, sy), (sx + d.vx*GRID_SIZE, sy + d.vy*GRID_SIZE), 2)
-                pygame.draw.circle(screen, col, (sx + d.vx*GRID_SIZE, sy + d.vy*GRID_SIZE), 3)
-
-        if winner_id == -1:
-            txt = font.render(f"Player {current_player+1}'s Turn | [ESC]-Menu", True, (0,0,0))
-            pygame.draw.rect(screen, (255,255,255), (5,5, txt.get_width()+10, 30))
-            screen.blit(txt, (10, 10))
+        if race.update_crashes(current_time):
+            trails_dirty = True
+            wake = True
+        prof.mark("engine")
+        dirty_rects += draw_cars(screen, font, race, current_time, camera)
+        prof.mark("cars")
+
+        if race.winner == -1:
+            if show_move_hints: dirty_rects += draw_move_hints(screen, race, camera)
+            dirty_rects += draw_hud(screen, font, race)
         else:
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 150))
             screen.blit(overlay, (0,0))
             
-            win_d = lib.Game_get_car_data(game_ptr, winner_id)
+            win_d = cars[race.winner]
             safe_col_idx = win_d.color if win_d.color < len(CAR_PALETTE) else 0
             win_col = CAR_PALETTE[safe_col_idx]
             
-            win_font = pygame.font.SysFont("Segoe UI", 60, bold=True)
-            win_txt = win_font.render(f"PLAYER {winner_id+1} WINS!", True, win_col)
+            win_font = text_cache.font("Segoe UI", 60, bold=True)
+            win_txt = text_cache.render(win_font, f"PLAYER {race.winner+1} WINS!", win_col)
             screen.blit(win_txt, (WIDTH//2 - win_txt.get_width()//2, HEIGHT//2 - 50))
             
-            hint_font = pygame.font.SysFont("Segoe UI", 30)
-            hint_txt = hint_font.render("Press any key to Menu", True, (255, 255, 255))
+            hint_font = text_cache.font("Segoe UI", 30)
+            hint_txt = text_cache.render(hint_font, "Press any key to Menu", (255, 255, 255))
             screen.blit(hint_txt, (WIDTH//2 - hint_txt.get_width()//2, HEIGHT//2 + 20))
+        prof.mark("text")
 
-        pygame.display.flip()
+        if show_profiler:
+            dirty_rects.append(draw_profiler(screen, prof))
+            prof.mark("overlay")
+
+        if full_redraw: pygame.display.flip()
+        else: pygame.display.update(prev_rects + dirty_rects)
+        full_redraw = False
+        prof.mark("flip")
+        prof.end_frame()
         clock.tick(60)
     
-    lib.Game_delete(game_ptr)
+    race.close()
     return "MENU"
 
 def main():
+    init_engine()
     pygame.init()
     pygame.mixer.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Racetrack Deluxe")
-    font = pygame.font.SysFont("Segoe UI", 24, bold=True)
+    font = text_cache.font("Segoe UI", 24, bold=True)
 
     while True:
         start = run_menu(screen, font)
@@ -527,6 +850,10 @@ def main():
         res = run_game(screen, font)
         if res == "QUIT": break
 
+    if map_thumbnails: map_thumbnails.close()
+    if PROFILE_PATH:
+        write_report(PROFILE_PATH, [menu_profiler, game_profiler])
+        print(f"Frame profile written to {PROFILE_PATH}")
     pygame.quit()
 
 if __name__ == "__main__":
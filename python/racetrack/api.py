@@ -0,0 +1,122 @@
+import ctypes
+
+
+# Спільний опис C API рушія (RacetrackEngine.dll)
+
+PLAYING, CRASHED, FINISHED = 0, 1, 2
+
+# Ті самі 9 прискорень, що й на цифровій клавіатурі в run_game (KP1..KP9);
+# біт k маски Game_probe_moves - ACCELERATIONS[k]
+ACCELERATIONS = [(-1, 1), (0, 1), (1, 1),
+                 (-1, 0), (0, 0), (1, 0),
+                 (-1, -1), (0, -1), (1, -1)]
+
+
+class CarExportData(ctypes.Structure):
+    _fields_ = [("x", ctypes.c_int), ("y", ctypes.c_int),
+                ("vx", ctypes.c_int), ("vy", ctypes.c_int),
+                ("state", ctypes.c_int), ("color", ctypes.c_int)]
+
+
+class CollisionCacheStats(ctypes.Structure):
+    _fields_ = [("hits", ctypes.c_longlong), ("misses", ctypes.c_longlong),
+                ("size", ctypes.c_int), ("capacity", ctypes.c_int)]
+
+
+def bind_native(lib):
+    lib.Game_new.restype = ctypes.c_void_p
+    lib.Game_get_car_data.restype = CarExportData
+    lib.Game_get_car_count.restype = ctypes.c_int
+
+    lib.Game_new.argtypes = [ctypes.c_int, ctypes.c_int]
+    lib.Game_delete.argtypes = [ctypes.c_void_p]
+    lib.Game_add_wall.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.Game_add_car.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.Game_update_car.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.Game_get_car_data.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.Game_get_car_count.argtypes = [ctypes.c_void_p]
+    lib.Game_reset_car.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+
+    # Нові функції - старі збірки DLL їх не мають
+    if hasattr(lib, 'Game_get_collision_cache_stats'):
+        lib.Game_get_collision_cache_stats.restype = CollisionCacheStats
+        lib.Game_get_collision_cache_stats.argtypes = [ctypes.c_void_p]
+        lib.Game_set_collision_cache_capacity.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    if hasattr(lib, 'Game_get_all_car_data'):
+        lib.Game_get_all_car_data.restype = ctypes.c_int
+        lib.Game_get_all_car_data.argtypes = [ctypes.c_void_p, ctypes.POINTER(CarExportData), ctypes.c_int]
+        lib.Game_get_version.restype = ctypes.c_uint
+        lib.Game_get_version.argtypes = [ctypes.c_void_p]
+    if hasattr(lib, 'Game_probe_moves'):
+        lib.Game_probe_moves.restype = ctypes.c_uint
+        lib.Game_probe_moves.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.Game_probe_moves_batch.argtypes = [ctypes.POINTER(ctypes.c_void_p), ctypes.POINTER(ctypes.c_int),
+                                               ctypes.c_int, ctypes.POINTER(ctypes.c_uint)]
+    return lib
+
+
+def safe_accelerations(mask):
+    # Маска Game_probe_moves -> список безпечних прискорень
+    return [a for k, a in enumerate(ACCELERATIONS) if mask >> k & 1]
+
+
+def probe_moves_batch(lib, games, indices):
+    # Маски безпечних ходів для пар (сесія, машина) одним викликом рушія
+    n = len(games)
+    out = (ctypes.c_uint * n)()
+    if isinstance(lib, ctypes.CDLL):
+        lib.Game_probe_moves_batch((ctypes.c_void_p * n)(*games), (ctypes.c_int * n)(*indices), n, out)
+    else:
+        lib.Game_probe_moves_batch(games, indices, n, out)
+    return list(out)
+
+
+class CarSnapshot:
+    # Стан усіх машин сесії в одному буфері CarExportData[] (його ж видно як масив NumPy).
+    # refresh() перечитує буфер одним викликом і лише тоді, коли змінився лічильник версії.
+    # Зі старою DLL без Game_get_all_car_data читає машини по одній щоразу.
+
+    def __init__(self, lib, game_ptr, capacity=8):
+        self.lib = lib
+        self.game_ptr = game_ptr
+        self.bulk = hasattr(lib, 'Game_get_all_car_data')
+        self.version = None
+        self.count = 0
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self.buffer = (CarExportData * capacity)()
+        self.array = None
+
+    def refresh(self):
+        # True, якщо дані змінилися з минулого виклику
+        lib, game = self.lib, self.game_ptr
+        if not self.bulk:
+            self.count = lib.Game_get_car_count(game)
+            if self.count > len(self.buffer): self._alloc(self.count)
+            for i in range(self.count): self.buffer[i] = lib.Game_get_car_data(game, i)
+            return True
+
+        version = lib.Game_get_version(game)
+        if version == self.version: return False
+        self.count = lib.Game_get_all_car_data(game, self.buffer, len(self.buffer))
+        if self.count > len(self.buffer):
+            self._alloc(self.count)
+            self.count = lib.Game_get_all_car_data(game, self.buffer, len(self.buffer))
+        self.version = version
+        return True
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count: raise IndexError(index)
+        return self.buffer[index]
+
+    def as_array(self):
+        # Структурований масив з полями x, y, vx, vy, state, color - без копіювання.
+        # NumPy імпортується лише тут, щоб не гальмувати запуск гри
+        if self.array is None:
+            import numpy as np
+            self.array = np.ctypeslib.as_array(self.buffer)
+        return self.array[:self.count]
@@ -0,0 +1,95 @@
+import numpy as np
+
+from racetrack.api import ACCELERATIONS, PLAYING, CRASHED
+from racetrack.numpy_engine import Track
+
+
+# N незалежних сесій на одній карті у вигляді масивів (struct-of-arrays).
+# step() робить хід поточного гравця в кожній сесії за один виклик,
+# за тими ж правилами, що й GameSession::processInput.
+
+class BatchSim:
+    def __init__(self, width, height, walls, starts, n_sessions, finish=None):
+        self.track = Track(width, height)
+        for w in walls: self.track.add_wall(*w)
+        self.n_sessions = n_sessions
+        self.n_cars = len(starts)
+        self.starts = np.array(starts, dtype=np.int64).reshape(-1, 2)
+        self.finish = finish  # (x, y, w, h) у клітинках або None
+
+        self.pos = np.empty((n_sessions, self.n_cars, 2), dtype=np.int64)
+        self.vel = np.empty((n_sessions, self.n_cars, 2), dtype=np.int64)
+        self.state = np.empty((n_sessions, self.n_cars), dtype=np.int8)
+        self.current = np.empty(n_sessions, dtype=np.int64)
+        self.winner = np.empty(n_sessions, dtype=np.int64)
+        self._rows = np.arange(n_sessions)
+        self.reset()
+
+    @classmethod
+    def from_track(cls, track, starts, n_sessions):
+        width, height = track.size if track.size else (32, 24)
+        return cls(width, height, track.walls, starts, n_sessions, track.finish)
+
+    def reset(self, sessions=None):
+        if sessions is None: sessions = slice(None)
+        self.pos[sessions] = self.starts
+        self.vel[sessions] = 0
+        self.state[sessions] = PLAYING
+        self.current[sessions] = 0
+        self.winner[sessions] = -1
+
+    def respawn(self, mask):
+        # mask (N, C): повернути вибрані машини на старт, як Game_reset_car
+        self.pos[mask] = np.broadcast_to(self.starts, self.pos.shape)[mask]
+        self.vel[mask] = 0
+        self.state[mask] = PLAYING
+
+    def probe_moves(self):
+        # Маски безпечних прискорень поточного гравця кожної сесії (N,), як Game_probe_moves
+        # (біт k - ACCELERATIONS[k]); розбитим машинам і завершеним сесіям - 0
+        rows, cur = self._rows, self.current
+        p = self.pos[rows, cur]
+        nxt = (p + self.vel[rows, cur])[:, None, :] + np.array(ACCELERATIONS, dtype=np.int64)
+        hit_wall = self.track.is_collision_many(p[:, None, 0], p[:, None, 1], nxt[..., 0], nxt[..., 1])
+        same = (self.pos[:, None, :, :] == nxt[:, :, None, :]).all(axis=-1) & (self.state != CRASHED)[:, None, :]
+        same[rows, :, cur] = False
+        ok = ~hit_wall & ~same.any(axis=-1)
+        ok &= ((self.state[rows, cur] == PLAYING) & (self.winner == -1))[:, None]
+        return ok @ (1 << np.arange(len(ACCELERATIONS)))
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.n_sessions, 2)
+        rows, cur = self._rows, self.current
+
+        # Розбиті машини пропускають хід, як у run_game; завершені сесії стоять
+        active = (self.state[rows, cur] == PLAYING) & (self.winner == -1)
+        r, c = rows[active], cur[active]
+
+        p = self.pos[r, c]
+        v = self.vel[r, c] + actions[active]
+        nxt = p + v
+
+        hit_wall = self.track.is_collision_many(p[:, 0], p[:, 1], nxt[:, 0], nxt[:, 1])
+
+        same = (self.pos[r] == nxt[:, None, :]).all(axis=-1) & (self.state[r] != CRASHED)
+        same[np.arange(len(r)), c] = False
+        hit_car = same.any(axis=1) & ~hit_wall
+        hit_idx = same.argmax(axis=1)
+
+        crashed = hit_wall | hit_car
+        moved = ~crashed
+        self.vel[r, c] = np.where(crashed[:, None], 0, v)
+        self.pos[r[moved], c[moved]] = nxt[moved]
+        self.state[r[crashed], c[crashed]] = CRASHED
+        self.vel[r[hit_car], hit_idx[hit_car]] = 0
+        self.state[r[hit_car], hit_idx[hit_car]] = CRASHED
+
+        if self.finish is not None:
+            fx, fy, fw, fh = self.finish
+            x, y = self.pos[r, c, 0], self.pos[r, c, 1]
+            won = (x >= fx) & (x < fx + fw) & (y >= fy) & (y < fy + fh)
+            self.winner[r[won]] = c[won]
+
+        running = self.winner == -1
+        self.current[running] = (cur[running] + 1) % self.n_cars
+        return self.pos, self.vel, self.state
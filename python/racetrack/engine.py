@@ -0,0 +1,24 @@
+import ctypes
+import os
+
+from racetrack.api import bind_native
+
+
+# Вибір рушія без pygame: RacetrackEngine.dll через ctypes або його порт на NumPy.
+# auto - DLL, якщо вона є і завантажується, інакше NumPy; native - тільки DLL; numpy - тільки NumPy
+
+def load_engine(dll_path, backend="auto"):
+    # Для native без DLL - FileNotFoundError, якщо DLL не завантажується - OSError
+    if backend in ("auto", "native"):
+        if os.path.exists(dll_path):
+            try:
+                return bind_native(ctypes.CDLL(dll_path))
+            except OSError as e:
+                if backend == "native": raise
+                print(f"Error loading DLL: {e}")
+                print("Falling back to the NumPy engine")
+        elif backend == "native":
+            raise FileNotFoundError(dll_path)
+
+    from racetrack.numpy_engine import NumpyEngine
+    return NumpyEngine()
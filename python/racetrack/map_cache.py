@@ -0,0 +1,144 @@
+import os
+import threading
+
+import numpy as np
+
+from racetrack.track_file import read_track
+
+
+# Скомпільовані карти: текст карти і вже відмасштабовані пікселі фону й мініатюри
+# в одному бінарному файлі поруч із картою (track1.txt -> track1.mapcache).
+# Файл відкривається через memmap, тож пікселі читаються з диска лише коли потрібні.
+# Кеш недійсний, якщо змінились mtime/розмір карти чи картинки або розміри пікселів.
+# bg_size - розмір фону або функція від SIZE карти (None, якщо SIZE не вказано), що його повертає.
+# Шлях до картинки (відносно карти) лежить у кінці файлу, його довжина - в заголовку.
+
+MAP_CACHE_VERSION = 2
+MAGIC = b"RTMAPCV1"
+
+F_SIZE, F_START, F_FINISH, F_IMAGE, F_ALPHA = 1, 2, 4, 8, 16
+
+HEADER = np.dtype([
+    ("magic", "S8"), ("version", "<i4"), ("flags", "<i4"),
+    ("src_mtime", "<i8"), ("src_size", "<i8"),
+    ("img_mtime", "<i8"), ("img_size", "<i8"), ("image_len", "<i4"),
+    ("size", "<i4", 2), ("start", "<i4", 4), ("finish", "<i4", 4),
+    ("n_walls", "<i4"), ("bg_size", "<i4", 2), ("thumb_size", "<i4", 2),
+])
+
+
+class CompiledMap:
+    def __init__(self, header, data):
+        flags = int(header["flags"])
+        self.size = tuple(int(v) for v in header["size"]) if flags & F_SIZE else None
+        self.start = tuple(int(v) for v in header["start"]) if flags & F_START else None
+        self.finish = tuple(int(v) for v in header["finish"]) if flags & F_FINISH else None
+        self.has_image = bool(flags & F_IMAGE)
+        self.pixel_format = "RGBA" if flags & F_ALPHA else "RGB"
+
+        n = int(header["n_walls"])
+        bw, bh = (int(v) for v in header["bg_size"])
+        tw, th = (int(v) for v in header["thumb_size"])
+        off = HEADER.itemsize
+        self.walls = data[off:off + n * 16].view("<i4").reshape(n, 4)
+        off += n * 16
+        # Пікселі рядками, як у pygame.image.tobytes(surf, pixel_format)
+        self.background = self.thumbnail = None
+        if self.has_image:
+            c = len(self.pixel_format)
+            self.background = data[off:off + bw * bh * c].reshape(bh, bw, c)
+            off += bw * bh * c
+            self.thumbnail = data[off:off + tw * th * c].reshape(th, tw, c)
+
+
+def cache_path(map_path):
+    return os.path.splitext(map_path)[0] + ".mapcache"
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return 0, 0
+
+
+def load_map(map_path, bg_size, thumb_size):
+    # CompiledMap з кешу, або компіляція карти з записом кешу; None, якщо карти немає
+    if not os.path.exists(map_path): return None
+    path = cache_path(map_path)
+    try:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = data[:HEADER.itemsize].view(HEADER)[0]
+        if _is_fresh(header, data, map_path, bg_size, thumb_size): return CompiledMap(header, data)
+        # Закрити відображення до перезапису (на Windows інакше os.replace не спрацює)
+        del header, data
+    except (OSError, ValueError):
+        pass
+
+    blob = compile_map(map_path, bg_size, thumb_size)
+    try:
+        # Окремий тимчасовий файл на потік: мініатюри компілюються у фонових потоках
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f: f.write(blob)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    data = np.frombuffer(blob, dtype=np.uint8)
+    return CompiledMap(data[:HEADER.itemsize].view(HEADER)[0], data)
+
+
+def _bg_size(bg_size, size):
+    return tuple(bg_size(size) if callable(bg_size) else bg_size)
+
+
+def _is_fresh(header, data, map_path, bg_size, thumb_size):
+    if header["magic"] != MAGIC or header["version"] != MAP_CACHE_VERSION: return False
+    if (header["src_mtime"], header["src_size"]) != _stamp(map_path): return False
+    size = tuple(int(v) for v in header["size"]) if int(header["flags"]) & F_SIZE else None
+    if tuple(header["bg_size"]) != _bg_size(bg_size, size) or tuple(header["thumb_size"]) != tuple(thumb_size): return False
+    # Шлях до картинки береться з кешу: текст карти не змінився, отже й рядок IMAGE той самий
+    n = int(header["image_len"])
+    if not n: return True
+    image = bytes(data[len(data) - n:]).decode("utf-8")
+    return (header["img_mtime"], header["img_size"]) == _stamp(os.path.join(os.path.dirname(map_path), image))
+
+
+def compile_map(map_path, bg_size, thumb_size):
+    data = read_track(map_path)
+    header = np.zeros(1, dtype=HEADER)[0]
+    header["magic"] = MAGIC
+    header["version"] = MAP_CACHE_VERSION
+    header["src_mtime"], header["src_size"] = _stamp(map_path)
+    bg_size = _bg_size(bg_size, data.size)
+    header["bg_size"], header["thumb_size"] = bg_size, thumb_size
+    flags = 0
+    if data.size: header["size"] = data.size; flags |= F_SIZE
+    if data.start: header["start"] = data.start; flags |= F_START
+    if data.finish: header["finish"] = data.finish; flags |= F_FINISH
+    header["n_walls"] = len(data.walls)
+    walls = np.array(data.walls, dtype="<i4").reshape(-1, 4)
+
+    pixels = image = b""
+    if data.image:
+        # Шлях зберігається й для відсутньої картинки, щоб кеш оновився, коли вона з'явиться
+        image = os.path.relpath(data.image, os.path.dirname(map_path)).encode("utf-8")
+        header["image_len"] = len(image)
+        header["img_mtime"], header["img_size"] = _stamp(data.image)
+        if os.path.exists(data.image):
+            flags |= F_IMAGE
+            pixels, alpha = _scaled_pixels(data.image, bg_size, thumb_size)
+            if alpha: flags |= F_ALPHA
+    header["flags"] = flags
+    return header.tobytes() + walls.tobytes() + pixels + image
+
+
+def _scaled_pixels(image_path, bg_size, thumb_size):
+    # Масштабування - як у GameMap: картинка -> розмір вікна -> мініатюра.
+    # Альфа-канал зберігається, лише якщо він є в картинці
+    import pygame
+    bg = pygame.transform.scale(pygame.image.load(image_path), bg_size)
+    thumb = pygame.transform.scale(bg, thumb_size)
+    alpha = bool(bg.get_flags() & pygame.SRCALPHA)
+    fmt = "RGBA" if alpha else "RGB"
+    return pygame.image.tobytes(bg, fmt) + pygame.image.tobytes(thumb, fmt), alpha
@@ -0,0 +1,283 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from racetrack.api import ACCELERATIONS, CarExportData, CollisionCacheStats, PLAYING, CRASHED
+
+
+# Порт GameSession з cpp/RacetrackEngine/main.cpp на NumPy.
+# Перевірка стін векторизована: один рух проти всіх відрізків одразу.
+
+def _orientation(px, py, qx, qy, rx, ry):
+    # Знак збігається з Track::orientation (там 1/2, тут +1/-1)
+    return np.sign((qy - py) * (rx - qx) - (qx - px) * (ry - qy))
+
+
+def _on_segment(px, py, ax, ay, bx, by):
+    return ((px >= np.minimum(ax, bx)) & (px <= np.maximum(ax, bx)) &
+            (py >= np.minimum(ay, by)) & (py <= np.maximum(ay, by)))
+
+
+def segments_intersect(p1x, p1y, q1x, q1y, p2x, p2y, q2x, q2y):
+    o1 = _orientation(p1x, p1y, q1x, q1y, p2x, p2y)
+    o2 = _orientation(p1x, p1y, q1x, q1y, q2x, q2y)
+    o3 = _orientation(p2x, p2y, q2x, q2y, p1x, p1y)
+    o4 = _orientation(p2x, p2y, q2x, q2y, q1x, q1y)
+    return (((o1 != o2) & (o3 != o4)) |
+            ((o1 == 0) & _on_segment(p2x, p2y, p1x, p1y, q1x, q1y)) |
+            ((o2 == 0) & _on_segment(q2x, q2y, p1x, p1y, q1x, q1y)) |
+            ((o3 == 0) & _on_segment(p1x, p1y, p2x, p2y, q2x, q2y)) |
+            ((o4 == 0) & _on_segment(q1x, q1y, p2x, p2y, q2x, q2y)))
+
+
+def _ranges(starts, counts):
+    # Зшиті діапазони [s, s + n) для кожної пари (s, n)
+    total = int(counts.sum())
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+class WallGrid:
+    # Рівномірна сітка стін (як у Track з main.cpp): комірка зберігає індекси стін,
+    # чия рамка її перекриває; рух перевіряється лише з кандидатами з комірок своєї рамки.
+    CELL_SIZE = 4
+
+    def __init__(self, walls, width, height):
+        self.gw = max(1, -(-width // self.CELL_SIZE))
+        self.gh = max(1, -(-height // self.CELL_SIZE))
+        x0, x1, y0, y1 = self._cell_ranges(walls[0], walls[1], walls[2], walls[3])
+        cell, wall = self._cells(x0, x1, y0, y1)
+        order = np.argsort(cell, kind='stable')
+        self.cell_walls = wall[order]
+        self.cell_start = np.searchsorted(cell[order], np.arange(self.gw * self.gh + 1))
+        self.cell_start_list = self.cell_start.tolist()
+
+    def _cell_ranges(self, ax, ay, bx, by):
+        cs = self.CELL_SIZE
+        x0 = np.clip(np.minimum(ax, bx) // cs, 0, self.gw - 1)
+        x1 = np.clip(np.maximum(ax, bx) // cs, 0, self.gw - 1)
+        y0 = np.clip(np.minimum(ay, by) // cs, 0, self.gh - 1)
+        y1 = np.clip(np.maximum(ay, by) // cs, 0, self.gh - 1)
+        return x0, x1, y0, y1
+
+    def _cells(self, x0, x1, y0, y1):
+        # Усі комірки кожної рамки: (індекс комірки, індекс відрізка)
+        nx = x1 - x0 + 1
+        counts = nx * (y1 - y0 + 1)
+        owner = np.repeat(np.arange(len(x0)), counts)
+        k = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = x0[owner] + k % nx[owner]
+        cy = y0[owner] + k // nx[owner]
+        return cy * self.gw + cx, owner
+
+    def candidates_one(self, sx, sy, ex, ey):
+        # Скалярний варіант без векторної обробки рамок - дешевший для одного руху
+        cs, start = self.CELL_SIZE, self.cell_start_list
+        x0 = min(max(min(sx, ex) // cs, 0), self.gw - 1)
+        x1 = min(max(max(sx, ex) // cs, 0), self.gw - 1)
+        parts = []
+        for cy in range(min(max(min(sy, ey) // cs, 0), self.gh - 1), min(max(max(sy, ey) // cs, 0), self.gh - 1) + 1):
+            row = cy * self.gw
+            a, b = start[row + x0], start[row + x1 + 1]
+            if a != b: parts.append(self.cell_walls[a:b])
+        if not parts: return self.cell_walls[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def candidates(self, sx, sy, ex, ey):
+        # Пари (індекс руху, індекс стіни) для перевірки; дублікати можливі, на результат не впливають
+        cell, move = self._cells(*self._cell_ranges(sx, sy, ex, ey))
+        counts = self.cell_start[cell + 1] - self.cell_start[cell]
+        return np.repeat(move, counts), self.cell_walls[_ranges(self.cell_start[cell], counts)]
+
+
+class Track:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # Для малої кількості стін повний векторизований перебір швидший за сітку
+        self.grid_min_walls = 16
+        self._wall_list = []
+        self._walls = None
+        self._grid = None
+        # LRU-кеш результатів is_collision за (початок, кінець) руху
+        self.cache_capacity = 4096
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+
+    def add_wall(self, x1, y1, x2, y2):
+        self._wall_list.append((x1, y1, x2, y2))
+        self._walls = None
+        self._grid = None
+        self._cache.clear()
+
+    def set_cache_capacity(self, capacity):
+        self.cache_capacity = max(0, capacity)
+        self._cache.clear()
+
+    @property
+    def walls(self):
+        # Масив (4, N) збирається ліниво, щоб завантаження карти не було O(N^2)
+        if self._walls is None:
+            self._walls = np.array(self._wall_list, dtype=np.int64).reshape(-1, 4).T.copy()
+        return self._walls
+
+    @property
+    def grid(self):
+        if self._grid is None:
+            self._grid = WallGrid(self.walls, self.width, self.height)
+        return self._grid
+
+    def is_collision(self, sx, sy, ex, ey):
+        if ex < 0 or ex >= self.width or ey < 0 or ey >= self.height: return True
+        if not self.cache_capacity: return self._hits_wall(sx, sy, ex, ey)
+
+        key = (sx, sy, ex, ey)
+        cache = self._cache
+        hit = cache.get(key)
+        if hit is not None:
+            self.cache_hits += 1
+            cache.move_to_end(key)
+            return hit
+        self.cache_misses += 1
+        hit = cache[key] = self._hits_wall(sx, sy, ex, ey)
+        if len(cache) > self.cache_capacity: cache.popitem(last=False)
+        return hit
+
+    def _hits_wall(self, sx, sy, ex, ey):
+        w = self.walls
+        if not w.shape[1]: return False
+        if w.shape[1] >= self.grid_min_walls:
+            idx = self.grid.candidates_one(sx, sy, ex, ey)
+            if not len(idx): return False
+            return bool(segments_intersect(sx, sy, ex, ey, w[0][idx], w[1][idx], w[2][idx], w[3][idx]).any())
+        return bool(segments_intersect(sx, sy, ex, ey, w[0], w[1], w[2], w[3]).any())
+
+    def is_collision_many(self, sx, sy, ex, ey, use_grid=True):
+        # Те саме для масиву рухів: результат має форму broadcast(sx, sy, ex, ey).
+        # Для пакета рухів сітка вигідна за будь-якої кількості стін.
+        sx, sy, ex, ey = np.broadcast_arrays(*(np.asarray(a, dtype=np.int64) for a in (sx, sy, ex, ey)))
+        hit = (ex < 0) | (ex >= self.width) | (ey < 0) | (ey >= self.height)
+        w = self.walls
+        if not w.shape[1]: return hit
+        if use_grid:
+            return hit | self._grid_hits(sx.ravel(), sy.ravel(), ex.ravel(), ey.ravel()).reshape(hit.shape)
+        return hit | segments_intersect(sx[..., None], sy[..., None], ex[..., None], ey[..., None],
+                                        w[0], w[1], w[2], w[3]).any(axis=-1)
+
+    def _grid_hits(self, sx, sy, ex, ey):
+        move, wall = self.grid.candidates(sx, sy, ex, ey)
+        w = self.walls
+        res = segments_intersect(sx[move], sy[move], ex[move], ey[move],
+                                 w[0][wall], w[1][wall], w[2][wall], w[3][wall])
+        hit = np.zeros(len(sx), dtype=bool)
+        hit[move[res]] = True
+        return hit
+
+
+class GameSession:
+    def __init__(self, width, height):
+        self.track = Track(width, height)
+        self.cars = []  # [x, y, vx, vy, state, color]
+        self.version = 0
+
+    def add_player(self, x, y, color):
+        self.cars.append([x, y, 0, 0, PLAYING, color])
+        self.version += 1
+
+    def add_wall_to_track(self, x1, y1, x2, y2):
+        self.track.add_wall(x1, y1, x2, y2)
+
+    def reset_player(self, index, x, y):
+        if 0 <= index < len(self.cars):
+            self.cars[index][:5] = [x, y, 0, 0, PLAYING]
+            self.version += 1
+
+    def get_car_count(self):
+        return len(self.cars)
+
+    def get_collision_cache_stats(self):
+        t = self.track
+        return CollisionCacheStats(t.cache_hits, t.cache_misses, len(t._cache), t.cache_capacity)
+
+    def set_collision_cache_capacity(self, capacity):
+        self.track.set_cache_capacity(capacity)
+
+    def get_player_export(self, index):
+        if 0 <= index < len(self.cars):
+            return CarExportData(*self.cars[index])
+        return CarExportData(0, 0, 0, 0, -1, 0)
+
+    def copy_player_exports(self, out, capacity):
+        for i, c in enumerate(self.cars[:capacity]): out[i] = CarExportData(*c)
+        return len(self.cars)
+
+    def find_car_at_position(self, x, y, ignore_index):
+        for i, c in enumerate(self.cars):
+            if i == ignore_index: continue
+            if c[4] == CRASHED: continue
+            if c[0] == x and c[1] == y: return i
+        return -1
+
+    def probe_moves(self, index):
+        # Маска прискорень без аварії (стіни, межі, інші машини) - як processInput, але без змін
+        if index < 0 or index >= len(self.cars): return 0
+        x, y, vx, vy, state, _ = self.cars[index]
+        if state != PLAYING: return 0
+        acc = _PROBE_ACCELERATIONS
+        nx, ny = x + vx + acc[:, 0], y + vy + acc[:, 1]
+        ok = ~self.track.is_collision_many(x, y, nx, ny)
+        for i, c in enumerate(self.cars):
+            if i != index and c[4] != CRASHED: ok &= (nx != c[0]) | (ny != c[1])
+        return int(ok @ _PROBE_BITS)
+
+    def process_input(self, index, dx, dy):
+        if index < 0 or index >= len(self.cars): return
+        car = self.cars[index]
+        self.version += 1
+
+        if car[4] == PLAYING:
+            car[2] += dx
+            car[3] += dy
+
+        nx, ny = car[0] + car[2], car[1] + car[3]
+        hit_wall = self.track.is_collision(car[0], car[1], nx, ny)
+        hit_car = self.find_car_at_position(nx, ny, index)
+
+        if hit_wall:
+            _crash(car)
+        elif hit_car != -1:
+            _crash(car)
+            _crash(self.cars[hit_car])
+        elif car[4] == PLAYING:
+            car[0], car[1] = nx, ny
+
+
+_PROBE_ACCELERATIONS = np.array(ACCELERATIONS, dtype=np.int64)
+_PROBE_BITS = 1 << np.arange(len(ACCELERATIONS))
+
+
+def _crash(car):
+    car[2] = car[3] = 0
+    car[4] = CRASHED
+
+
+class NumpyEngine:
+    # Той самий набір функцій Game_*, що експортує RacetrackEngine.dll,
+    # тож main.py працює з ним без змін. game_ptr тут - об'єкт GameSession.
+
+    def Game_new(self, width, height): return GameSession(width, height)
+    def Game_delete(self, game_ptr): pass
+    def Game_add_car(self, game_ptr, x, y, color): game_ptr.add_player(x, y, color)
+    def Game_add_wall(self, game_ptr, x1, y1, x2, y2): game_ptr.add_wall_to_track(x1, y1, x2, y2)
+    def Game_get_car_count(self, game_ptr): return game_ptr.get_car_count()
+    def Game_get_car_data(self, game_ptr, index): return game_ptr.get_player_export(index)
+    def Game_update_car(self, game_ptr, index, ax, ay): game_ptr.process_input(index, ax, ay)
+    def Game_reset_car(self, game_ptr, index, x, y): game_ptr.reset_player(index, x, y)
+    def Game_get_all_car_data(self, game_ptr, out, capacity): return game_ptr.copy_player_exports(out, capacity)
+    def Game_get_version(self, game_ptr): return game_ptr.version
+    def Game_get_collision_cache_stats(self, game_ptr): return game_ptr.get_collision_cache_stats()
+    def Game_set_collision_cache_capacity(self, game_ptr, capacity): game_ptr.set_collision_cache_capacity(capacity)
+    def Game_probe_moves(self, game_ptr, index): return game_ptr.probe_moves(index)
+    def Game_probe_moves_batch(self, game_ptrs, indices, count, out):
+        for i in range(count): out[i] = game_ptrs[i].probe_moves(indices[i])
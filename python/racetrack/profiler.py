@@ -0,0 +1,75 @@
+import json
+import time
+from collections import deque
+from itertools import islice
+
+
+# Профілювання кадру по фазах: mark(name) приписує фазі name час від попередньої позначки.
+# Вимкнений профайлер нічого не міряє - виклики mark коштують одну перевірку.
+# Для кожної фази зберігаються останні max_samples тривалостей (перцентилі) і лог-гістограма
+# за весь час (кошики по степенях двійки мікросекунд).
+
+HIST_BUCKETS = 24  # 1 мкс ... ~8 с
+
+
+class FrameProfiler:
+    def __init__(self, name, enabled=False, max_samples=100000):
+        self.name = name
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.frames = 0
+        self.samples = {}     # фаза -> deque тривалостей (нс)
+        self.histograms = {}  # фаза -> лічильники кошиків
+        self._t = None
+        self._frame = []
+
+    def start_frame(self):
+        if not self.enabled: return
+        self._frame = []
+        self._t = time.perf_counter_ns()
+
+    def mark(self, phase):
+        if self._t is None or not self.enabled: return
+        t = time.perf_counter_ns()
+        self._frame.append((phase, t - self._t))
+        self._t = t
+
+    def end_frame(self):
+        # Кадр, який не дійшов до end_frame (пропущене малювання), не враховується
+        if self._t is None or not self.enabled: return
+        totals = {}
+        for phase, ns in self._frame:
+            totals[phase] = totals.get(phase, 0) + ns
+        totals["frame"] = sum(totals.values())
+        for phase, ns in totals.items():
+            if phase not in self.samples:
+                self.samples[phase] = deque(maxlen=self.max_samples)
+                self.histograms[phase] = [0] * HIST_BUCKETS
+            self.samples[phase].append(ns)
+            self.histograms[phase][min(max(ns // 1000, 1).bit_length() - 1, HIST_BUCKETS - 1)] += 1
+        self.frames += 1
+        self._t = None
+
+    def percentiles(self, phase, qs=(50, 95, 99), last=None):
+        # Перцентилі в мілісекундах по останніх last кадрах (або по всіх збережених)
+        data = self.samples.get(phase)
+        if not data: return [0.0] * len(qs)
+        values = sorted(islice(reversed(data), last) if last else data)
+        return [values[min(len(values) - 1, len(values) * q // 100)] / 1e6 for q in qs]
+
+    def report(self):
+        phases = {}
+        for phase, hist in self.histograms.items():
+            p50, p95, p99 = self.percentiles(phase)
+            phases[phase] = {
+                "count": len(self.samples[phase]), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                "max_ms": max(self.samples[phase]) / 1e6,
+                # Кошик i - тривалості від 2^i до 2^(i+1) мкс
+                "histogram_us": {f"{1 << i}-{1 << (i + 1)}": c for i, c in enumerate(hist) if c},
+            }
+        return {"frames": self.frames, "phases": phases}
+
+
+def write_report(path, profilers):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({p.name: p.report() for p in profilers if p.frames}, f, indent=1)
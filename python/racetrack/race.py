@@ -0,0 +1,125 @@
+from racetrack.api import CarExportData, CarSnapshot, CRASHED
+from racetrack.track_file import start_positions
+from racetrack.trail import Trail
+
+
+# Правила гонки з run_game без pygame: розстановка на старті, черга ходів,
+# аварії з респавном через RESPAWN_DELAY секунд і перемога на фініші.
+# track - будь-що з полями start, finish, walls (TrackData, CompiledMap), у клітинках.
+# recorder (RaceRecorder з racetrack/replay.py) отримує кожен хід, пропуск і респавн.
+# simplify_trails - сліди без проміжних точок на прямих (racetrack/trail.py).
+
+RESPAWN_DELAY = 3.0
+
+# Типи подій запису гонки (формат - у racetrack/replay.py)
+MOVE, SKIP, RESPAWN = 0, 1, 2
+
+
+class Race:
+    def __init__(self, lib, track, colors, size=None, starts=None, recorder=None, simplify_trails=False):
+        self.lib = lib
+        self.recorder = recorder
+        self.simplify_trails = simplify_trails
+        width, height = size or track.size or (32, 24)
+        self.game_ptr = lib.Game_new(width, height)
+        for w in track.walls: lib.Game_add_wall(self.game_ptr, int(w[0]), int(w[1]), int(w[2]), int(w[3]))
+
+        self.finish = track.finish
+        self.start_positions = list(starts) if starts else start_positions(track.start, len(colors))
+        for (x, y), color in zip(self.start_positions, colors):
+            lib.Game_add_car(self.game_ptr, x, y, color)
+
+        # Стан усіх машин читається одним викликом і лише після змін
+        self.cars = CarSnapshot(lib, self.game_ptr, max(len(colors), 1))
+        self.cars.refresh()
+        self.total_players = len(self.cars)
+        self.current_player = 0
+        self.winner = -1
+        self.trails = [Trail(self.cars[i].x, self.cars[i].y, simplify_trails) for i in range(self.total_players)]
+        self.crash_timers = {}  # індекс машини -> час, коли аварію помічено
+
+    def close(self):
+        if self.recorder:
+            self.cars.refresh()
+            self.recorder.close(self.cars)
+            self.recorder = None
+        if self.game_ptr is not None:
+            self.lib.Game_delete(self.game_ptr)
+            self.game_ptr = None
+
+    def reset(self):
+        # Нова гонка в тій самій сесії рушія: стіни й кеш колізій лишаються, машини - на старт
+        for i, (x, y) in enumerate(self.start_positions): self.lib.Game_reset_car(self.game_ptr, i, x, y)
+        self.current_player = 0
+        self.winner = -1
+        for trail, (x, y) in zip(self.trails, self.start_positions): trail.reset(x, y)
+        self.crash_timers = {}
+
+    def car(self, index):
+        self.cars.refresh()
+        return self.cars[index]
+
+    def probe_moves(self, index=None):
+        # Маска прискорень без аварії для машини (за замовчуванням поточної), стан не змінюється;
+        # None, якщо рушій цього не вміє (стара DLL)
+        if not hasattr(self.lib, 'Game_probe_moves'): return None
+        return self.lib.Game_probe_moves(self.game_ptr, self.current_player if index is None else index)
+
+    def in_finish(self, x, y):
+        if not self.finish: return False
+        fx, fy, fw, fh = self.finish
+        return fx <= x < fx + fw and fy <= y < fy + fh
+
+    def play(self, dx, dy):
+        # Хід поточного гравця (має бути PLAYING); повертає копію його стану після ходу
+        player = self.current_player
+        self.lib.Game_update_car(self.game_ptr, player, dx, dy)
+        d = CarExportData.from_buffer_copy(self.car(player))
+
+        if self.recorder: self.recorder.event(MOVE, player, dx, dy, d)
+
+        if self.in_finish(d.x, d.y): self.winner = player
+        self.trails[player].append(d.x, d.y)
+        if self.winner == -1: self.next_player()
+        return d
+
+    def next_player(self):
+        self.current_player = (self.current_player + 1) % self.total_players
+
+    def skip_turn(self):
+        # Розбита машина пропускає хід
+        if self.recorder: self.recorder.event(SKIP, self.current_player)
+        self.next_player()
+
+    def respawn(self, index):
+        rx, ry = self.start_positions[index]
+        self.lib.Game_reset_car(self.game_ptr, index, rx, ry)
+        self.crash_timers.pop(index, None)
+        self.trails[index].reset(rx, ry)
+        # Стан читається повз знімок cars: run_game малює машини зі знімка до респавну
+        if self.recorder: self.recorder.event(RESPAWN, index, car=self.lib.Game_get_car_data(self.game_ptr, index))
+
+    def update_crashes(self, now):
+        # Запускає таймери нових аварій і повертає на старт машини, чий час вийшов.
+        # Повертає індекси респавнених машин
+        respawned = []
+        if self.winner != -1: return respawned
+        self.cars.refresh()
+        for i in range(self.total_players):
+            if self.cars[i].state != CRASHED:
+                self.crash_timers.pop(i, None)
+                continue
+            started = self.crash_timers.setdefault(i, now)
+            if now - started >= RESPAWN_DELAY:
+                self.respawn(i)
+                respawned.append(i)
+        return respawned
+
+    def respawn_remaining(self, index, now):
+        started = self.crash_timers.get(index)
+        return None if started is None else RESPAWN_DELAY - (now - started)
+
+    def next_timer_step(self, now, step):
+        # Скільки чекати до наступного кроку відліку; None - таймерів немає
+        if not self.crash_timers or self.winner != -1: return None
+        return min(step - (now - t) % step for t in self.crash_timers.values())
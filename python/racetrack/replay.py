@@ -0,0 +1,137 @@
+import glob
+import hashlib
+import itertools
+import os
+import struct
+import time
+
+from racetrack.race import Race, MOVE, SKIP, RESPAWN
+from racetrack.track_file import read_track
+
+
+# Запис гонки в компактний бінарний лог і безголове відтворення.
+# Формат (little-endian):
+#   заголовок  HEADER: magic, версія, номер карти, розмір поля, кількість машин, sha1 файлу карти
+#   машини     CAR x n_cars: стартова позиція і колір
+#   події      EVENT до кінця файлу: час від старту (мс), тип, гравець, прискорення,
+#              стан машини після події (x, y, vx, vy, state)
+# MOVE - хід гравця, SKIP - пропуск ходу розбитої машини, RESPAWN - повернення на старт,
+# FINAL - стан кожної машини в кінці гонки.
+
+MAGIC = b"RTREPLAY"
+REPLAY_VERSION = 1
+
+HEADER = struct.Struct("<8sHIHHB20s")
+CAR = struct.Struct("<hhB")
+EVENT = struct.Struct("<IBBbbhhhhb")
+
+FINAL = 3
+
+
+def file_sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+_replay_counter = itertools.count()
+
+
+def new_replay_path(replays_dir, keep=50):
+    # Шлях для нового запису: час, PID і лічильник процесу, тож дві гонки за секунду не перезаписують
+    # одна одну. Найстаріші записи race-*.rtr понад keep - 1 видаляються
+    os.makedirs(replays_dir, exist_ok=True)
+    old = []
+    for path in glob.glob(os.path.join(replays_dir, "race-*.rtr")):
+        try: old.append((os.path.getmtime(path), path))
+        except OSError: pass
+    old.sort()
+    for _, path in old[:max(0, len(old) - keep + 1)]:
+        try: os.remove(path)
+        except OSError: pass
+    return os.path.join(replays_dir, f"race-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_replay_counter)}.rtr")
+
+
+class RaceRecorder:
+    def __init__(self, path, map_id, map_sha1, size, starts, colors):
+        self.file = open(path, 'wb')
+        self.t0 = time.monotonic()
+        self.file.write(HEADER.pack(MAGIC, REPLAY_VERSION, map_id, size[0], size[1], len(starts), map_sha1))
+        for (x, y), color in zip(starts, colors):
+            self.file.write(CAR.pack(x, y, color))
+
+    def event(self, kind, player, ax=0, ay=0, car=None):
+        ms = int((time.monotonic() - self.t0) * 1000)
+        x, y, vx, vy, state = (car.x, car.y, car.vx, car.vy, car.state) if car else (0, 0, 0, 0, 0)
+        self.file.write(EVENT.pack(ms, kind, player, ax, ay, x, y, vx, vy, state))
+
+    def close(self, cars):
+        if self.file.closed: return
+        for i in range(len(cars)): self.event(FINAL, i, car=cars[i])
+        self.file.close()
+
+
+class Replay:
+    def __init__(self, map_id, map_sha1, size, starts, colors, events):
+        self.map_id = map_id
+        self.map_sha1 = map_sha1
+        self.size = size
+        self.starts = starts
+        self.colors = colors
+        self.events = events  # кортежі (ms, kind, player, ax, ay, x, y, vx, vy, state)
+
+    @property
+    def turns(self):
+        return sum(1 for e in self.events if e[1] == MOVE)
+
+
+def read_replay(path):
+    with open(path, 'rb') as f: data = f.read()
+    magic, version, map_id, w, h, n_cars, sha1 = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != REPLAY_VERSION: raise ValueError(f"not a replay file: {path}")
+    off = HEADER.size
+    starts, colors = [], []
+    for _ in range(n_cars):
+        x, y, color = CAR.unpack_from(data, off)
+        starts.append((x, y))
+        colors.append(color)
+        off += CAR.size
+    # Обірваний останній запис (гру закрили посеред запису) відкидається
+    end = off + (len(data) - off) // EVENT.size * EVENT.size
+    events = list(EVENT.iter_unpack(data[off:end]))
+    return Replay(map_id, sha1, (w, h), starts, colors, events)
+
+
+def load_replay_track(replay, maps_dir):
+    # Карта гонки; ValueError, якщо файл карти змінився після запису
+    path = os.path.join(maps_dir, f"track{replay.map_id}.txt")
+    if not os.path.exists(path): raise FileNotFoundError(path)
+    if file_sha1(path) != replay.map_sha1: raise ValueError(f"map changed since recording: {path}")
+    return read_track(path)
+
+
+def run_replay(lib, replay, track):
+    # Відтворює гонку без затримок; повертає (кількість ходів, список розбіжностей)
+    race = Race(lib, track, replay.colors, replay.size, starts=replay.starts, simplify_trails=True)
+    mismatches = []
+    turns = 0
+    try:
+        for n, (ms, kind, player, ax, ay, *expected) in enumerate(replay.events):
+            if kind == MOVE:
+                if player != race.current_player:
+                    mismatches.append((n, "turn order", player, race.current_player))
+                    break
+                d = race.play(ax, ay)
+                turns += 1
+            elif kind == SKIP:
+                race.skip_turn()
+                continue
+            elif kind == RESPAWN:
+                race.respawn(player)
+                continue
+            else:
+                d = race.car(player)
+            got = [d.x, d.y, d.vx, d.vy, d.state]
+            if got != expected: mismatches.append((n, player, expected, got))
+    finally:
+        race.close()
+    return turns, mismatches
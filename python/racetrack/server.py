@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import os
+import struct
+import time
+import traceback
+
+from racetrack.api import CRASHED
+from racetrack.engine import load_engine
+from racetrack.race import Race, RESPAWN_DELAY
+from racetrack.track_file import read_track, start_positions
+
+
+# Сервер гонок для віддалених гравців: тисячі сесій (Race) в одному процесі на asyncio.
+#   python -m racetrack.server --port 8765
+# Ходи з усіх з'єднань збираються за один прохід циклу подій і застосовуються пачкою,
+# після чого кожна змінена сесія розсилає одну дельту, а кожне з'єднання отримує один write.
+# Респавн розбитих машин - одне колесо таймерів на весь сервер замість опитування time.time().
+#
+# Протокол TCP (little-endian): кожне повідомлення - довжина (FRAME), далі тіло, перший байт - тип.
+#   клієнт -> сервер: OPEN (нова сесія на карті maps/track<id>.txt), MOVE, CLOSE, WATCH (підписка)
+#   сервер -> клієнт: OPENED (номер сесії на запит), STATE (усі машини), DELTA (лише змінені), ERROR
+# STATE і DELTA: номер сесії, кількість ходів, поточний гравець, переможець (-1 - ще немає)
+# і записи CAR_STATE. Ходити може будь-хто з підписаних на сесію, але лише за поточного гравця;
+# розбиті машини пропускають хід самі, як у run_game.
+# Сесії нумеруються з 1: ERROR із сесією 0 не стосується жодної сесії (невдалий OPEN - з номером запиту).
+# Клієнт, що не встигає читати: після WRITE_HIGH байтів у черзі запису сервер перестає читати
+# його повідомлення, а після max_buffer байтів (дельти чужих ходів) - розриває з'єднання.
+# OPEN понад max_sessions сесій на сервері чи conn_sessions на з'єднанні отримує ERR_LIMIT.
+# Виняток під час обробки повідомлення - ERR_INTERNAL цьому клієнту, решта пачки обробляється далі;
+# сесія, що не змогла розіслати стан чи повернути машину на старт, закривається з ERR_INTERNAL.
+
+FRAME = struct.Struct("<H")
+
+OPEN, MOVE, CLOSE, WATCH = 1, 2, 3, 4
+OPENED, STATE, DELTA, ERROR = 0x81, 0x82, 0x83, 0x8F
+
+OPEN_MSG = struct.Struct("<BIHB")       # тип, номер запиту, номер карти, кількість машин
+MOVE_MSG = struct.Struct("<BIBbb")      # тип, сесія, гравець, прискорення
+SESSION_MSG = struct.Struct("<BI")      # CLOSE, WATCH: тип, сесія
+OPENED_MSG = struct.Struct("<BII")      # тип, номер запиту, сесія
+STATE_HEAD = struct.Struct("<BIIBhB")   # тип, сесія, ходів, поточний гравець, переможець, записів
+CAR_STATE = struct.Struct("<Bhhhhb")    # машина, x, y, vx, vy, state
+ERROR_MSG = struct.Struct("<BIIB")      # тип, сесія (0 - без сесії), номер запиту OPEN (інакше 0), код
+
+ERR_PROTOCOL, ERR_MAP, ERR_SESSION, ERR_TURN, ERR_MOVE, ERR_CRASHED, ERR_FINISHED, ERR_LIMIT, ERR_INTERNAL = range(1, 10)
+
+MAX_CARS = 16  # більше машин на старт не стає; індекси машин і гравців у протоколі - один байт
+WRITE_HIGH = 256 * 1024
+MAX_BUFFER = 4 * 1024 * 1024
+MAX_SESSIONS = 100000
+CONN_SESSIONS = 1000
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def frame(body):
+    return FRAME.pack(len(body)) + body
+
+
+def split_frames(buf):
+    # Повні повідомлення з початку буфера (bytearray); прочитане з нього видаляється
+    out = []
+    off, end = 0, len(buf)
+    while end - off >= FRAME.size:
+        (n,) = FRAME.unpack_from(buf, off)
+        if end - off - FRAME.size < n: break
+        out.append(bytes(buf[off + FRAME.size:off + FRAME.size + n]))
+        off += FRAME.size + n
+    del buf[:off]
+    return out
+
+
+def encode_state(kind, session, turn, current, winner, cars):
+    # cars - пари (індекс, (x, y, vx, vy, state))
+    body = [STATE_HEAD.pack(kind, session, turn, current, winner, len(cars))]
+    body += [CAR_STATE.pack(i, *c) for i, c in cars]
+    return frame(b"".join(body))
+
+
+def decode_state(body):
+    # -> (тип, сесія, ходів, поточний, переможець, [(індекс, x, y, vx, vy, state)])
+    head = STATE_HEAD.unpack_from(body, 0)
+    return head[:5] + (list(CAR_STATE.iter_unpack(body[STATE_HEAD.size:STATE_HEAD.size + head[5] * CAR_STATE.size])),)
+
+
+class TimerWheel:
+    # Хешоване колесо таймерів: кошик на кожні resolution секунд, len(slots) кошиків по колу.
+    # Таймер далі ніж на оберт лежить у своєму кошику до потрібного оберту.
+    # schedule - O(1), advance переглядає лише кошики тіків, що минули; раніше часу нічого не спрацьовує
+    def __init__(self, resolution=0.05, slots=256, now=0.0):
+        self.resolution = resolution
+        self.slots = [[] for _ in range(slots)]
+        self.tick = int(now / resolution)  # останній оброблений тік
+        self.count = 0
+
+    def schedule(self, when, item):
+        t = max(-int(-when // self.resolution), self.tick + 1)
+        self.slots[t % len(self.slots)].append((t, item))
+        self.count += 1
+
+    def advance(self, now):
+        # Елементи, чий час настав
+        target = int(now / self.resolution)
+        n = len(self.slots)
+        due = []
+        for t in range(self.tick + 1, min(target, self.tick + n) + 1):
+            slot = self.slots[t % n]
+            if not slot: continue
+            due += [item for tt, item in slot if tt <= target]
+            self.slots[t % n] = [e for e in slot if e[0] > target]
+        self.tick = max(self.tick, target)
+        self.count -= len(due)
+        return due
+
+
+class Session:
+    def __init__(self, sid, race):
+        self.id = sid
+        self.race = race
+        self.turn = 0
+        self.watchers = set()
+        race.cars.refresh()
+        self.sent = [car_state(race.cars[i]) for i in range(race.total_players)]  # стан у клієнтів
+
+
+def car_state(d):
+    return d.x, d.y, d.vx, d.vy, d.state
+
+
+class Connection(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.buf = bytearray()
+        self.out = []
+        self.sessions = set()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=WRITE_HIGH)
+
+    # Черга запису переповнена - нові повідомлення клієнта не читаються, поки вона не спорожніє
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def data_received(self, data):
+        self.buf += data
+        msgs = split_frames(self.buf)
+        if msgs: self.server.submit(self, msgs)
+
+    def connection_lost(self, exc):
+        self.server.disconnect(self)
+        self.transport = None
+
+
+class RaceServer:
+    def __init__(self, lib, maps_dir, respawn_delay=RESPAWN_DELAY, resolution=0.05, max_buffer=MAX_BUFFER,
+                 max_sessions=MAX_SESSIONS, conn_sessions=CONN_SESSIONS):
+        self.lib = lib
+        self.maps_dir = maps_dir
+        self.respawn_delay = respawn_delay
+        self.resolution = resolution
+        self.max_buffer = max_buffer
+        self.max_sessions = max_sessions
+        self.conn_sessions = conn_sessions
+        self.loop = None
+        self.tracks = {}    # номер карти -> TrackData (None - карти немає)
+        self.sessions = {}  # номер сесії -> Session
+        self.next_id = 1
+        self.pending = []   # (з'єднання, повідомлення) за поточний прохід циклу
+        self.outbox = set()
+        self.wheel = TimerWheel(resolution, now=time.monotonic())
+        self._flush_handle = None
+        self._tick_handle = None
+        self.stats = {"moves": 0, "batches": 0, "respawns": 0, "deltas": 0, "sessions": 0, "dropped": 0, "failed": 0}
+
+    def track(self, map_id):
+        if map_id not in self.tracks:
+            path = os.path.join(self.maps_dir, f"track{map_id}.txt")
+            self.tracks[map_id] = read_track(path) if os.path.exists(path) else None
+        return self.tracks[map_id]
+
+    def send(self, conn, data):
+        if conn.transport is None: return
+        conn.out.append(data)
+        self.outbox.add(conn)
+
+    def flush_output(self):
+        for conn in self.outbox:
+            transport = conn.transport
+            conn.out, out = [], conn.out
+            if transport is None: continue
+            transport.write(b"".join(out))
+            if transport.get_write_buffer_size() > self.max_buffer:
+                # Клієнт не читає - з'єднання розривається, його сесії закриваються в disconnect
+                self.stats["dropped"] += 1
+                transport.abort()
+                conn.transport = None
+        self.outbox.clear()
+
+    def submit(self, conn, msgs):
+        # Повідомлення чекають кінця поточного проходу циклу подій - тоді обробляються всі разом
+        self.pending += [(conn, m) for m in msgs]
+        if self._flush_handle is None: self._flush_handle = self.loop.call_soon(self.process)
+
+    def process(self):
+        self._flush_handle = None
+        pending, self.pending = self.pending, []
+        now = time.monotonic()
+        touched = {}  # змінені сесії в порядку змін
+        for conn, msg in pending:
+            kind = msg[0] if msg else 0
+            sid = request = 0
+            try:
+                if kind == MOVE and len(msg) == MOVE_MSG.size:
+                    _, sid, player, ax, ay = MOVE_MSG.unpack(msg)
+                    self.move(conn, touched, sid, player, ax, ay)
+                elif kind == OPEN and len(msg) == OPEN_MSG.size:
+                    _, request, map_id, cars = OPEN_MSG.unpack(msg)
+                    self.open(conn, request, map_id, cars)
+                elif kind in (CLOSE, WATCH) and len(msg) == SESSION_MSG.size:
+                    sid = SESSION_MSG.unpack(msg)[1]
+                    if kind == CLOSE: self.unwatch(conn, sid)
+                    else: self.watch(conn, sid)
+                else:
+                    self.send(conn, frame(ERROR_MSG.pack(ERROR, 0, 0, ERR_PROTOCOL)))
+            except Exception:
+                traceback.print_exc()
+                self.stats["failed"] += 1
+                self.send(conn, frame(ERROR_MSG.pack(ERROR, sid, request, ERR_INTERNAL)))
+        self.stats["batches"] += 1
+        self.publish_all(touched, now)
+        self.flush_output()
+
+    def publish_all(self, touched, now):
+        for s in touched:
+            if s.id not in self.sessions: continue
+            try: self.publish(s, now)
+            except Exception: self.close_failed(s)
+
+    def close_failed(self, s):
+        # Сесія з винятком у рушії чи розсилці закривається, підписники отримують ERR_INTERNAL
+        traceback.print_exc()
+        self.stats["failed"] += 1
+        for conn in list(s.watchers):
+            self.send(conn, frame(ERROR_MSG.pack(ERROR, s.id, 0, ERR_INTERNAL)))
+            self.unwatch(conn, s.id)
+
+    def open(self, conn, request, map_id, cars):
+        track = self.track(map_id)
+        code = 0
+        if track is None: code = ERR_MAP
+        elif not 1 <= cars <= MAX_CARS or not self.fits_start(track, cars): code = ERR_PROTOCOL
+        elif len(self.sessions) >= self.max_sessions or len(conn.sessions) >= self.conn_sessions: code = ERR_LIMIT
+        if code:
+            self.send(conn, frame(ERROR_MSG.pack(ERROR, 0, request, code)))
+            return
+        s = Session(self.next_id, Race(self.lib, track, list(range(cars)), track.size))
+        self.next_id += 1
+        self.sessions[s.id] = s
+        self.stats["sessions"] += 1
+        self.send(conn, frame(OPENED_MSG.pack(OPENED, request, s.id)))
+        self.watch(conn, s.id)
+
+    @staticmethod
+    def fits_start(track, cars):
+        # Розстановка з Race: усі машини мають стояти в межах карти
+        width, height = track.size or (32, 24)
+        return all(0 <= x <= width and 0 <= y <= height for x, y in start_positions(track.start, cars))
+
+    def watch(self, conn, sid):
+        s = self.sessions.get(sid)
+        if s is None:
+            self.send(conn, frame(ERROR_MSG.pack(ERROR, sid, 0, ERR_SESSION)))
+            return
+        s.watchers.add(conn)
+        conn.sessions.add(sid)
+        race = s.race
+        race.cars.refresh()
+        cars = [(i, car_state(race.cars[i])) for i in range(race.total_players)]
+        self.send(conn, encode_state(STATE, sid, s.turn, race.current_player, race.winner, cars))
+
+    def unwatch(self, conn, sid):
+        # Сесія без жодного підписника закривається
+        s = self.sessions.get(sid)
+        conn.sessions.discard(sid)
+        if s is None: return
+        s.watchers.discard(conn)
+        if not s.watchers:
+            s.race.close()
+            del self.sessions[sid]
+
+    def disconnect(self, conn):
+        for sid in list(conn.sessions): self.unwatch(conn, sid)
+        self.outbox.discard(conn)
+
+    def move(self, conn, touched, sid, player, ax, ay):
+        s = self.sessions.get(sid)
+        code = 0
+        if s is None or conn not in s.watchers: code = ERR_SESSION
+        elif s.race.winner != -1: code = ERR_FINISHED
+        elif player != s.race.current_player: code = ERR_TURN
+        elif not (-1 <= ax <= 1 and -1 <= ay <= 1): code = ERR_MOVE
+        elif s.race.car(player).state == CRASHED: code = ERR_CRASHED  # розбиті всі - чекаємо респавну
+        if code:
+            self.send(conn, frame(ERROR_MSG.pack(ERROR, sid, 0, code)))
+            return
+        s.race.play(ax, ay)
+        s.turn += 1
+        self.stats["moves"] += 1
+        touched[s] = None
+
+    def publish(self, s, now):
+        # Нові аварії (і машини, в яку врізалися) - у колесо таймерів, розбитий поточний гравець
+        # пропускає хід, підписники отримують лише машини, що змінилися з минулої розсилки
+        race = s.race
+        race.cars.refresh()
+        if race.winner == -1:
+            for i in range(race.total_players):
+                if race.cars[i].state == CRASHED and i not in race.crash_timers:
+                    race.crash_timers[i] = now
+                    self.wheel.schedule(now + self.respawn_delay, (s.id, i, now))
+            for _ in range(race.total_players):
+                if race.cars[race.current_player].state != CRASHED: break
+                race.skip_turn()
+        changed = []
+        for i in range(race.total_players):
+            c = car_state(race.cars[i])
+            if c != s.sent[i]:
+                s.sent[i] = c
+                changed.append((i, c))
+        data = encode_state(DELTA, s.id, s.turn, race.current_player, race.winner, changed)
+        for conn in s.watchers: self.send(conn, data)
+        self.stats["deltas"] += 1
+        if self.wheel.count and self._tick_handle is None:
+            self._tick_handle = self.loop.call_later(self.resolution, self.tick)
+
+    def tick(self):
+        # Один таймер на весь сервер: респавн машин, чий час вийшов
+        self._tick_handle = None
+        now = time.monotonic()
+        touched = {}
+        for sid, index, crashed_at in self.wheel.advance(now):
+            s = self.sessions.get(sid)
+            # Сесію могли закрити, а машину - вже повернути на старт
+            if s is None or s.race.winner != -1 or s.race.crash_timers.get(index) != crashed_at: continue
+            try: s.race.respawn(index)
+            except Exception:
+                self.close_failed(s)
+                continue
+            self.stats["respawns"] += 1
+            touched[s] = None
+        self.publish_all(touched, now)
+        self.flush_output()
+        if self.wheel.count and self._tick_handle is None:
+            self._tick_handle = self.loop.call_later(self.resolution, self.tick)
+
+
+async def serve(server, host, port):
+    server.loop = asyncio.get_running_loop()
+    listener = await server.loop.create_server(lambda: Connection(server), host, port)
+    print(f"listening on {host}:{listener.sockets[0].getsockname()[1]}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m racetrack.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 - any free port")
+    parser.add_argument("--maps", default=os.path.join(root_dir, "maps"), help="directory with track<id>.txt")
+    parser.add_argument("--respawn-delay", type=float, default=RESPAWN_DELAY)
+    parser.add_argument("--tick", type=float, default=0.05, help="timer wheel resolution, seconds")
+    parser.add_argument("--max-buffer", type=int, default=MAX_BUFFER,
+                        help="unsent bytes after which a client that does not read is disconnected")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS, help="open sessions on the server")
+    parser.add_argument("--conn-sessions", type=int, default=CONN_SESSIONS, help="sessions one connection may watch")
+    parser.add_argument("--engine", choices=["auto", "native", "numpy"], default="auto")
+    parser.add_argument("--dll", default=os.path.join(root_dir, "bin", "RacetrackEngine.dll"))
+    args = parser.parse_args()
+
+    server = RaceServer(load_engine(args.dll, args.engine), args.maps, args.respawn_delay, args.tick, args.max_buffer,
+                        args.max_sessions, args.conn_sessions)
+    t = time.perf_counter()
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    st = server.stats
+    elapsed = time.perf_counter() - t
+    print(f"{st['sessions']} sessions, {st['moves']} moves in {st['batches']} batches "
+          f"({st['moves'] / max(st['batches'], 1):.1f} per batch), {st['respawns']} respawns, "
+          f"{st['deltas']} deltas, {st['dropped']} slow clients dropped, {st['failed']} failed messages, {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
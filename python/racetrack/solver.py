@@ -0,0 +1,284 @@
+import hashlib
+import os
+
+import numpy as np
+
+from racetrack.api import ACCELERATIONS
+from racetrack.numpy_engine import Track
+from racetrack.track_file import read_track
+
+
+# Пошук оптимальної траєкторії (A*) у просторі станів (x, y, vx, vy).
+# Евристика - BFS-поля відстаней від фінішу: по клітинках (8 сусідів) і, якщо вміщується
+# в пам'ять, точне поле по станах. Обидва кешуються на диску поруч із картою
+# (track1.txt -> track1.dist.npz).
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+DIST_CACHE_VERSION = 1
+
+
+def turns_lower_bound(dist, speed):
+    # Мінімум ходів t, за які машина зі швидкістю speed (по Чебишову) може пройти dist клітинок:
+    # за t ходів швидкість росте щонайбільше до speed + t, тож шлях <= t*speed + t(t+1)/2.
+    # Працює і для масивів.
+    dist = np.asarray(dist, dtype=np.int64)
+    speed = np.asarray(speed, dtype=np.int64)
+    b = speed + 0.5
+    t = np.maximum(np.ceil(np.sqrt(b * b + 2 * dist) - b), 0).astype(np.int64)
+    # Поправка на похибку float
+    t = np.where((t > 0) & ((t - 1) * speed + (t - 1) * t // 2 >= dist), t - 1, t)
+    t = np.where(t * speed + t * (t + 1) // 2 < dist, t + 1, t)
+    return t
+
+
+def _pack(x, y, vx, vy):
+    # Стан -> int64: по 16 біт на координату й швидкість (зі зсувом, значення в межах +-16384)
+    return ((x + 0x4000) << 48) | ((y + 0x4000) << 32) | ((vx + 0x4000) << 16) | (vy + 0x4000)
+
+
+def _unpack(keys):
+    return (((keys >> 48) & 0xFFFF) - 0x4000, ((keys >> 32) & 0xFFFF) - 0x4000,
+            ((keys >> 16) & 0xFFFF) - 0x4000, (keys & 0xFFFF) - 0x4000)
+
+
+class Solver:
+    # Повне поле по станах будується, лише якщо вміщується в стільки комірок int16
+    MAX_STATE_FIELD = 32 * 1024 * 1024
+
+    def __init__(self, track_data, map_path=None):
+        self.width, self.height = track_data.size if track_data.size else (32, 24)
+        self.finish = track_data.finish
+        self.track = Track(self.width, self.height)
+        for w in track_data.walls: self.track.add_wall(*w)
+        self.map_path = map_path
+        # Від стану спокою швидкість v набирається щонайменше за v(v+1)/2 клітинок
+        self.max_speed = 0
+        while (self.max_speed + 1) * (self.max_speed + 2) // 2 < max(self.width, self.height):
+            self.max_speed += 1
+        self.dist, self.state_dist = self._load_fields()
+        self.nodes_expanded = 0
+        self._plan = []
+
+    @classmethod
+    def from_file(cls, map_path):
+        data = read_track(map_path)
+        if data is None: return None
+        return cls(data, map_path)
+
+    # Поля відстаней
+
+    def _cache_path(self):
+        return os.path.splitext(self.map_path)[0] + ".dist.npz"
+
+    def _cache_key(self):
+        with open(self.map_path, 'rb') as f:
+            return f"{DIST_CACHE_VERSION}:{self.MAX_STATE_FIELD}:{hashlib.sha1(f.read()).hexdigest()}"
+
+    def _load_fields(self):
+        if self.map_path:
+            key = self._cache_key()
+            try:
+                with np.load(self._cache_path()) as cached:
+                    if str(cached['key']) == key and cached['dist'].shape == (self.height, self.width):
+                        state_dist = cached['state_dist']
+                        return cached['dist'], (state_dist if state_dist.size else None)
+            except (OSError, KeyError, ValueError):
+                pass
+        dist = self.build_distance_field()
+        state_dist = self.build_state_field()
+        if self.map_path:
+            try:
+                np.savez(self._cache_path(), dist=dist, key=key,
+                         state_dist=state_dist if state_dist is not None else np.empty(0, dtype=np.int16))
+            except OSError: pass
+        return dist, state_dist
+
+    def build_distance_field(self):
+        # BFS від фінішних клітинок; крок між сусідніми клітинками дозволений, якщо не перетинає стіну.
+        # Перевірка відрізка симетрична, тож прямі й зворотні ребра однакові.
+        w, h = self.width, self.height
+        ys, xs = np.divmod(np.arange(w * h), w)
+        open_dirs = [~self.track.is_collision_many(xs, ys, xs + dx, ys + dy) for dx, dy in DIRECTIONS]
+
+        dist = np.full(w * h, -1, dtype=np.int32)
+        frontier = np.flatnonzero(self.in_finish(xs, ys))
+        dist[frontier] = 0
+
+        level = 0
+        while len(frontier):
+            level += 1
+            reached = []
+            for (dx, dy), is_open in zip(DIRECTIONS, open_dirs):
+                n = frontier[is_open[frontier]] + dy * w + dx
+                n = n[dist[n] < 0]
+                dist[n] = level
+                reached.append(n)
+            frontier = np.unique(np.concatenate(reached))
+        return dist.reshape(h, w)
+
+    def build_state_field(self):
+        # Зворотний BFS по станах (x, y, vx, vy): точна кількість ходів до фінішу без аварій.
+        # Стан (q, u) - машина щойно приїхала в q зі швидкістю u; у нього ведуть стани
+        # (q - u, u - a) для всіх 9 прискорень a, якщо відрізок q - u -> q не б'ється об стіну.
+        w, h, V = self.width, self.height, self.max_speed
+        vr = 2 * V + 1
+        if w * h * vr * vr > self.MAX_STATE_FIELD: return None
+        acc = np.array(ACCELERATIONS, dtype=np.int64)
+
+        dist = np.full((h, w, vr, vr), -1, dtype=np.int16)
+        fy, fx = np.nonzero(self.in_finish(*np.meshgrid(np.arange(w), np.arange(h))))
+        dist[fy, fx] = 0
+        frontier = np.flatnonzero(dist.ravel() == 0)
+
+        level = 0
+        while len(frontier):
+            level += 1
+            qy, qx, ux, uy = np.unravel_index(frontier, dist.shape)
+            ux, uy = ux - V, uy - V
+            px, py = qx - ux, qy - uy
+            ok = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+            ok[ok] = ~self.track.is_collision_many(px[ok], py[ok], qx[ok], qy[ok])
+            px, py, ux, uy = px[ok], py[ok], ux[ok], uy[ok]
+
+            vx = (ux[:, None] - acc[:, 0]).ravel()
+            vy = (uy[:, None] - acc[:, 1]).ravel()
+            px, py = np.repeat(px, 9), np.repeat(py, 9)
+            ok = (np.abs(vx) <= V) & (np.abs(vy) <= V)
+            n = np.ravel_multi_index((py[ok], px[ok], vx[ok] + V, vy[ok] + V), dist.shape)
+            n = np.unique(n[dist.ravel()[n] < 0])
+            dist.ravel()[n] = level
+            frontier = n
+        return dist
+
+    # Пошук
+
+    def heuristic(self, x, y, vx, vy):
+        # Нижня оцінка кількості ходів до фінішу; -1 - фініш недосяжний. Працює і для масивів.
+        # Якщо є поле по станах, оцінка точна.
+        x, y, vx, vy = np.broadcast_arrays(*(np.asarray(a, dtype=np.int64) for a in (x, y, vx, vy)))
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        cx, cy = np.where(inside, x, 0), np.where(inside, y, 0)
+        d = np.where(inside, self.dist[cy, cx], -1)
+        h = turns_lower_bound(np.maximum(d, 0), np.maximum(np.abs(vx), np.abs(vy)))
+        h = np.maximum(h, self._ballistic_bound(x, y, vx, vy, h))
+        h = np.where(d < 0, -1, h)
+
+        if self.state_dist is not None:
+            V = self.max_speed
+            known = inside & (np.abs(vx) <= V) & (np.abs(vy) <= V)
+            exact = self.state_dist[cy, cx, np.where(known, vx + V, 0), np.where(known, vy + V, 0)]
+            h = np.where(known, exact, h)
+        return h
+
+    def _ballistic_bound(self, x, y, vx, vy, h):
+        # Без стін: за t ходів машина опиниться в межах t(t+1)/2 (по Чебишову) від p + t*v.
+        # Враховує напрямок швидкості, чого не бачить поле відстаней. Перевіряємо лише t >= h.
+        if not self.finish: return h
+        fx, fy, fw, fh = self.finish
+        t = h.copy()
+        todo = np.ones(t.shape, dtype=bool)
+        for _ in range(64):
+            reach = t * (t + 1) // 2
+            px, py = x + t * vx, y + t * vy
+            gap = np.maximum(np.maximum(fx - px, px - (fx + fw - 1)), np.maximum(fy - py, py - (fy + fh - 1)))
+            todo &= gap > reach
+            if not todo.any(): break
+            t = t + todo
+        return t
+
+    def in_finish(self, x, y):
+        if not self.finish: return np.zeros(np.shape(x), dtype=bool)
+        fx, fy, fw, fh = self.finish
+        return (x >= fx) & (x < fx + fw) & (y >= fy) & (y < fy + fh)
+
+    def solve(self, x, y, vx=0, vy=0, weight=1, max_nodes=1000000):
+        # Повертає найкоротший (за ходами) список прискорень (ax, ay) до фінішу без аварій або None.
+        # A* з одиничною ціною ходу: відкриті стани згруповані за f = g + weight*h, і вся група
+        # з найменшим f розкривається одним векторизованим кроком.
+        # weight > 1 - зважений A*: шлях не довший за weight * оптимум, але вузлів у рази менше.
+        self.nodes_expanded = 0
+        h = int(self.heuristic(x, y, vx, vy))
+        if h < 0: return None
+        h = int(weight * h)
+
+        acc = np.array(ACCELERATIONS, dtype=np.int64)
+        start = int(_pack(x, y, vx, vy))
+        best = {start: 0}
+        parent = {start: None}
+        buckets = {h: [(start, 0)]}
+        while buckets:
+            f = min(buckets)
+            group = [(k, g) for k, g in buckets.pop(f) if best[k] == g]
+            if not group: continue
+            self.nodes_expanded += len(group)
+            if self.nodes_expanded > max_nodes: return None
+
+            keys = np.array([k for k, _ in group], dtype=np.int64)
+            gs = np.array([g for _, g in group], dtype=np.int64)
+            sx, sy, svx, svy = _unpack(keys)
+            nvx = (svx[:, None] + acc[:, 0]).ravel()
+            nvy = (svy[:, None] + acc[:, 1]).ravel()
+            sx, sy = np.repeat(sx, 9), np.repeat(sy, 9)
+            nx, ny = sx + nvx, sy + nvy
+
+            ok = ~self.track.is_collision_many(sx, sy, nx, ny)
+            won = np.flatnonzero(ok & self.in_finish(nx, ny))
+            if len(won):
+                i = int(won[0])
+                return self._path(parent, start, keys[i // 9], i % 9)
+
+            h = self.heuristic(nx, ny, nvx, nvy)
+            idx = np.flatnonzero(ok & (h >= 0))
+            child_g = np.repeat(gs + 1, 9)[idx]
+            child_f = child_g + (weight * h[idx]).astype(np.int64)
+            child_keys = _pack(nx[idx], ny[idx], nvx[idx], nvy[idx])
+            parent_keys = keys[idx // 9]
+            for k, g, cf, pk, ai in zip(child_keys.tolist(), child_g.tolist(), child_f.tolist(),
+                                        parent_keys.tolist(), (idx % 9).tolist()):
+                if best.get(k, g + 1) <= g: continue
+                best[k] = g
+                parent[k] = (pk, ai)
+                buckets.setdefault(cf, []).append((k, g))
+        return None
+
+    def _path(self, parent, start, key, accel):
+        moves = [ACCELERATIONS[accel]]
+        key = int(key)
+        while key != start:
+            key, accel = parent[key]
+            moves.append(ACCELERATIONS[accel])
+        moves.reverse()
+        return moves
+
+    def plan_move(self, x, y, vx, vy):
+        # Наступне прискорення для машини. З точним полем по станах - один крок по ньому,
+        # інакше A* з повторним використанням плану, поки машина йде за ним.
+        V = self.max_speed
+        if self.state_dist is not None and abs(vx) <= V and abs(vy) <= V:
+            return self._greedy_move(x, y, vx, vy)
+        state = (x, y, vx, vy)
+        if self._plan and self._plan[0][0] == state:
+            return self._plan.pop(0)[1]
+        moves = self.solve(x, y, vx, vy)
+        if not moves: return None
+        self._plan = []
+        for ax, ay in moves:
+            self._plan.append((state, (ax, ay)))
+            vx, vy = vx + ax, vy + ay
+            x, y = x + vx, y + vy
+            state = (x, y, vx, vy)
+        return self._plan.pop(0)[1]
+
+    def _greedy_move(self, x, y, vx, vy):
+        acc = np.array(ACCELERATIONS, dtype=np.int64)
+        nvx, nvy = vx + acc[:, 0], vy + acc[:, 1]
+        nx, ny = x + nvx, y + nvy
+        ok = ~self.track.is_collision_many(x, y, nx, ny)
+        won = np.flatnonzero(ok & self.in_finish(nx, ny))
+        if len(won): return ACCELERATIONS[won[0]]
+        h = self.heuristic(nx, ny, nvx, nvy)
+        h = np.where(ok & (h >= 0), h, np.iinfo(np.int64).max)
+        i = int(np.argmin(h))
+        if h[i] == np.iinfo(np.int64).max: return None
+        return ACCELERATIONS[i]
@@ -0,0 +1,217 @@
+import argparse
+import glob
+import importlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from racetrack.api import ACCELERATIONS, CRASHED, safe_accelerations
+from racetrack.engine import load_engine
+from racetrack.numpy_engine import Track
+from racetrack.race import Race
+from racetrack.solver import Solver
+from racetrack.track_file import read_track
+
+
+# Турнір ботів без вікна: кожна карта з maps/, кожна розсадка політик, --races гонок,
+# гонки розкидані по пулу процесів.
+#   python -m racetrack.tournament solver safe random --races 50 --workers 8
+# Кожен процес один раз завантажує рушій і один раз читає кожну карту; сесія рушія
+# (Game_new зі стінами) і боти на карту теж створюються один раз і перевикористовуються (Race.reset).
+# Замість годинника - умовний час ходу: розбита машина пропускає ходи, доки не мине RESPAWN_DELAY.
+# Політика - назва з POLICIES або "модуль:Клас" з тим самим інтерфейсом:
+#   Клас(track, map_path) і move(race, index, rng) -> (ax, ay). Хід повертається завжди:
+#   (0, 0) - їхати далі з тією ж швидкістю; розбиту машину run_race пропускає сам.
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+class RandomBot:
+    # Будь-яке з 9 прискорень
+    def __init__(self, track, map_path):
+        pass
+
+    def move(self, race, index, rng):
+        return rng.choice(ACCELERATIONS)
+
+
+class SafeBot:
+    # Випадкове прискорення серед тих, після яких машина не розіб'ється (Game_probe_moves:
+    # стіни, межі й інші машини); зі старою DLL - лише стіни, через власну Track
+    def __init__(self, track, map_path):
+        self.data = track
+        self.track = None
+
+    def move(self, race, index, rng):
+        mask = race.probe_moves(index)
+        if mask is None: mask = self._wall_mask(race.car(index))
+        ok = safe_accelerations(mask)
+        # Безпечного ходу немає - будь-який: машина розіб'ється й повернеться на старт
+        return rng.choice(ok or ACCELERATIONS)
+
+    def _wall_mask(self, d):
+        if self.track is None:
+            self.track = Track(*(self.data.size or (32, 24)))
+            for w in self.data.walls: self.track.add_wall(*w)
+        return sum(1 << k for k, (ax, ay) in enumerate(ACCELERATIONS)
+                   if not self.track.is_collision(d.x, d.y, d.x + d.vx + ax, d.y + d.vy + ay))
+
+
+class SolverBot:
+    # Оптимальна траєкторія (racetrack/solver.py); інші машини не враховує
+    def __init__(self, track, map_path):
+        self.solver = Solver(track, map_path)
+
+    def move(self, race, index, rng):
+        d = race.car(index)
+        # Шляху до фінішу немає - далі з тією ж швидкістю
+        return self.solver.plan_move(d.x, d.y, d.vx, d.vy) or (0, 0)
+
+
+POLICIES = {"random": RandomBot, "safe": SafeBot, "solver": SolverBot}
+
+
+def resolve_policy(spec):
+    if spec in POLICIES: return POLICIES[spec]
+    module, _, name = spec.partition(":")
+    if not name: raise ValueError(f"unknown policy: {spec}")
+    return getattr(importlib.import_module(module), name)
+
+
+def run_race(race, bots, rng, max_turns, turn_time):
+    # Одна гонка в уже створеній сесії; повертає (переможець або -1, ходів кожного, аварій кожного)
+    race.reset()
+    moves = [0] * race.total_players
+    crashes = [0] * race.total_players
+    now = 0.0
+    for _ in range(max_turns):
+        if race.winner != -1: break
+        race.update_crashes(now)
+        i = race.current_player
+        if race.car(i).state == CRASHED:
+            race.skip_turn()
+        else:
+            ax, ay = bots[i].move(race, i, rng)
+            moves[i] += 1
+            if race.play(ax, ay).state == CRASHED: crashes[i] += 1
+        now += turn_time
+    return race.winner, moves, crashes
+
+
+# Стан процесу-виконавця: рушій, прочитані карти, сесії й боти
+_worker = {}
+
+
+def _init_worker(dll_path, backend, policies):
+    _worker["lib"] = load_engine(dll_path, backend)
+    _worker["policies"] = [resolve_policy(p) for p in policies]
+    _worker["tracks"] = {}    # шлях карти -> TrackData
+    _worker["bots"] = {}      # (шлях карти, політика) -> бот
+    _worker["sessions"] = {}  # (шлях карти, кількість машин) -> Race
+
+
+def _play(task):
+    map_path, seats, seed, max_turns, turn_time = task
+    tracks, bots, sessions = _worker["tracks"], _worker["bots"], _worker["sessions"]
+    track = tracks.get(map_path)
+    if track is None: track = tracks[map_path] = read_track(map_path)
+    seat_bots = []
+    for p in seats:
+        key = (map_path, p)
+        if key not in bots: bots[key] = _worker["policies"][p](track, map_path)
+        seat_bots.append(bots[key])
+    race = sessions.get((map_path, len(seats)))
+    if race is None:
+        race = sessions[(map_path, len(seats))] = Race(_worker["lib"], track, list(range(len(seats))), track.size,
+                                                       simplify_trails=True)
+    winner, moves, crashes = run_race(race, seat_bots, random.Random(seed), max_turns, turn_time)
+    return map_path, seats, winner, moves, crashes
+
+
+def make_tasks(map_paths, n_policies, races, seed, max_turns, turn_time):
+    # Розсадки по колу, щоб кожна політика стартувала з кожного місця однаково часто
+    tasks = []
+    for m, map_path in enumerate(map_paths):
+        for r in range(races):
+            seats = [(s + r) % n_policies for s in range(n_policies)]
+            tasks.append((map_path, seats, seed * 1000003 + m * 10007 + r, max_turns, turn_time))
+    return tasks
+
+
+def summarize(policies, results):
+    stats = {p: {"races": 0, "wins": 0, "moves": 0, "win_moves": 0, "crashes": 0} for p in policies}
+    per_map = {}
+    draws = 0
+    for map_path, seats, winner, moves, crashes in results:
+        name = os.path.basename(map_path)
+        per_map.setdefault(name, {p: 0 for p in policies})
+        if winner == -1: draws += 1
+        for s, p in enumerate(seats):
+            st = stats[policies[p]]
+            st["races"] += 1
+            st["moves"] += moves[s]
+            st["crashes"] += crashes[s]
+            if s == winner:
+                st["wins"] += 1
+                st["win_moves"] += moves[s]
+                per_map[name][policies[p]] += 1
+    for st in stats.values():
+        st["win_rate"] = st["wins"] / st["races"] if st["races"] else 0.0
+        st["turns_per_win"] = st["win_moves"] / st["wins"] if st["wins"] else None
+        st["crashes_per_race"] = st["crashes"] / st["races"] if st["races"] else 0.0
+    return {"races": len(results), "draws": draws, "policies": stats, "wins_per_map": per_map}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m racetrack.tournament")
+    parser.add_argument("policies", nargs="+", help=f"{', '.join(POLICIES)} or module:Class")
+    parser.add_argument("--maps", nargs="*", help="map files (default: maps/track*.txt)")
+    parser.add_argument("--races", type=int, default=20, help="races per map")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-turns", type=int, default=1000, help="turn limit per race (then a draw)")
+    parser.add_argument("--turn-time", type=float, default=1.0, help="seconds a turn counts for the respawn delay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=["auto", "native", "numpy"], default="auto")
+    parser.add_argument("--dll", default=os.path.join(root_dir, "bin", "RacetrackEngine.dll"))
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    for p in args.policies: resolve_policy(p)
+    map_paths = args.maps or sorted(glob.glob(os.path.join(root_dir, "maps", "track*.txt")))
+    map_paths = [os.path.abspath(p) for p in map_paths]
+    tasks = make_tasks(map_paths, len(args.policies), args.races, args.seed, args.max_turns, args.turn_time)
+
+    # Поля відстаней розв'язувача будуються й кешуються на диску до старту пулу,
+    # щоб процеси не писали той самий .dist.npz одночасно
+    if "solver" in args.policies:
+        for path in map_paths: Solver(read_track(path), path)
+
+    init = (args.dll, args.engine, args.policies)
+    t = time.perf_counter()
+    if args.workers <= 1:
+        _init_worker(*init)
+        results = [_play(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=init) as pool:
+            results = list(pool.map(_play, tasks, chunksize=max(1, len(tasks) // (args.workers * 4))))
+    elapsed = time.perf_counter() - t
+
+    # Однакові політики в одній гонці рахуються окремо: safe#1, safe#2
+    labels = [p if args.policies.count(p) == 1 else f"{p}#{i + 1}" for i, p in enumerate(args.policies)]
+    summary = summarize(labels, results)
+    print(f"{summary['races']} races on {len(map_paths)} maps, {summary['draws']} draws, "
+          f"{elapsed:.2f} s ({summary['races'] / elapsed:,.1f} races/s, {args.workers} workers)")
+    print(f"{'policy':>16} {'races':>6} {'wins':>6} {'win rate':>9} {'turns/win':>10} {'crashes/race':>13}")
+    for name, st in summary["policies"].items():
+        tpw = f"{st['turns_per_win']:.1f}" if st["turns_per_win"] is not None else "-"
+        print(f"{name:>16} {st['races']:>6} {st['wins']:>6} {st['win_rate']:>9.1%} {tpw:>10} {st['crashes_per_race']:>13.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(summary, elapsed_s=elapsed, workers=args.workers, maps=map_paths), f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
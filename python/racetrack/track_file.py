@@ -0,0 +1,72 @@
+import os
+
+
+# Розбір текстового формату карт (maps/track*.txt) без pygame.
+# Усі координати - в клітинках сітки.
+
+class TrackData:
+    def __init__(self):
+        self.size = None
+        self.image = None
+        self.start = None   # (x, y, w, h)
+        self.finish = None  # (x, y, w, h)
+        self.walls = []     # [x1, y1, x2, y2]
+
+
+def read_track(filename):
+    if not os.path.exists(filename): return None
+    data = TrackData()
+    base_path = os.path.dirname(filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split()
+            if not parts or parts[0].startswith('#'): continue
+            cmd = parts[0]
+
+            if cmd == 'IMAGE':
+                data.image = os.path.join(base_path, parts[1])
+                continue
+
+            try: args = [int(x) for x in parts[1:]]
+            except ValueError: continue
+
+            if cmd == 'SIZE':
+                data.size = (args[0], args[1])
+            elif cmd == 'START':
+                data.start = tuple(args[:4])
+            elif cmd == 'FINISH':
+                data.finish = tuple(args[:4])
+            elif cmd == 'WALL':
+                data.walls.append(args[:4])
+    return data
+
+
+def start_positions(start, count, spacing=2.0):
+    # Та сама розстановка машин, що й у run_game
+    center_x, center_y = 2, 2
+    rect_w, rect_h = 4, 4
+    if start:
+        center_x = start[0] + start[2] / 2
+        center_y = start[1] + start[3] / 2
+        rect_w, rect_h = start[2], start[3]
+
+    is_horizontal_start = rect_w >= rect_h
+    positions = []
+    for i in range(count):
+        offset = (i - (count - 1) / 2.0) * spacing
+        if is_horizontal_start:
+            positions.append((int(center_x + offset), int(center_y)))
+        else:
+            positions.append((int(center_x), int(center_y + offset)))
+    return positions
+
+
+def write_track(filename, data):
+    # Зворотне до read_track; шлях до картинки записується відносно файлу карти
+    with open(filename, 'w', encoding='utf-8') as f:
+        if data.size: f.write(f"SIZE {data.size[0]} {data.size[1]}\n")
+        if data.image: f.write(f"IMAGE {os.path.relpath(data.image, os.path.dirname(filename) or '.')}\n")
+        if data.start: f.write("START {} {} {} {}\n".format(*data.start))
+        if data.finish: f.write("FINISH {} {} {} {}\n".format(*data.finish))
+        for w in data.walls: f.write("WALL {} {} {} {}\n".format(*w))
@@ -0,0 +1,48 @@
+from array import array
+
+
+# Слід машини - точки (x, y) у клітинках, підряд у масиві int16 (4 байти на точку).
+# Лише дописування в кінець і скидання на нову стартову точку.
+# simplify=True - точка, що продовжує пряму в тому ж напрямку, заміняє попередню,
+# а повтор останньої точки не додається: на довгих прямих зберігаються лише кінці.
+
+class Trail:
+    def __init__(self, x, y, simplify=False):
+        self.simplify = simplify
+        self.points = array('h', (x, y))
+
+    def __len__(self):
+        return len(self.points) // 2
+
+    def __getitem__(self, index):
+        n = len(self)
+        if index < 0: index += n
+        if not 0 <= index < n: raise IndexError(index)
+        return self.points[2 * index], self.points[2 * index + 1]
+
+    def __iter__(self):
+        p = self.points
+        return zip(p[0::2], p[1::2])
+
+    def append(self, x, y):
+        p = self.points
+        if self.simplify:
+            bx, by = p[-2], p[-1]
+            if (x, y) == (bx, by): return
+            if len(p) >= 4:
+                ax, ay = p[-4], p[-3]
+                ux, uy, vx, vy = bx - ax, by - ay, x - bx, y - by
+                if ux * vy == uy * vx and ux * vx + uy * vy > 0:
+                    p[-2], p[-1] = x, y
+                    return
+        p.extend((x, y))
+
+    def reset(self, x, y):
+        del self.points[2:]
+        self.points[0], self.points[1] = x, y
+
+    def as_array(self):
+        # Точки як масив NumPy (n, 2) int16 - одне копіювання буфера (подання без копії
+        # заблокувало б дописування, поки воно живе). NumPy імпортується лише тут
+        import numpy as np
+        return np.array(self.points, dtype=np.int16).reshape(-1, 2)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Тести запускаються з каталогу python/: python -m pytest -q
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
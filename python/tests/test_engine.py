@@ -0,0 +1,91 @@
+import ctypes
+import os
+import random
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from racetrack.api import CRASHED, bind_native
+from racetrack.numpy_engine import NumpyEngine, Track, segments_intersect
+
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+ENGINE_SOURCE = os.path.join(root_dir, "cpp", "RacetrackEngine", "main.cpp")
+
+MOVES = [(ax, ay) for ay in (-1, 0, 1) for ax in (-1, 0, 1)]
+
+
+@pytest.fixture(scope="module")
+def native(tmp_path_factory):
+    # Рушій з cpp/ як спільна бібліотека; bin/RacetrackEngine.dll тут не завантажиться
+    compiler = shutil.which("g++")
+    if os.name == "nt" or compiler is None: pytest.skip("needs g++ to build the C++ engine")
+    out = str(tmp_path_factory.mktemp("engine") / "librt.so")
+    subprocess.run([compiler, "-O2", "-shared", "-fPIC", "-std=c++17", "-D__declspec(x)=", ENGINE_SOURCE, "-o", out],
+                   check=True)
+    return bind_native(ctypes.CDLL(out))
+
+
+def random_walls(rng, width, height, n):
+    walls = [(0, 0, width - 1, 0), (0, height - 1, width - 1, height - 1),
+             (0, 0, 0, height - 1), (width - 1, 0, width - 1, height - 1)]
+    for _ in range(n):
+        x, y = rng.randrange(width), rng.randrange(height)
+        walls.append((x, y, min(max(x + rng.randint(-6, 6), 0), width - 1), min(max(y + rng.randint(-6, 6), 0), height - 1)))
+    return walls
+
+
+def new_game(lib, width, height, walls, starts):
+    game = lib.Game_new(width, height)
+    for w in walls: lib.Game_add_wall(game, *w)
+    for color, (x, y) in enumerate(starts): lib.Game_add_car(game, x, y, color)
+    return game
+
+
+def car_states(lib, game, n):
+    return [tuple(getattr(lib.Game_get_car_data(game, i), f) for f in ("x", "y", "vx", "vy", "state", "color"))
+            for i in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_numpy_engine_matches_native(native, seed):
+    rng = random.Random(seed)
+    width, height = 40, 30
+    walls = random_walls(rng, width, height, 10 + seed * 10)
+    starts = [(5 + 3 * i, 15) for i in range(4)]
+    engines = [native, NumpyEngine()]
+    games = [new_game(lib, width, height, walls, starts) for lib in engines]
+    try:
+        for turn in range(400):
+            i = turn % len(starts)
+            before = car_states(engines[0], games[0], len(starts))
+            if before[i][4] == CRASHED:
+                for lib, game in zip(engines, games): lib.Game_reset_car(game, i, *starts[i])
+            else:
+                ax, ay = rng.choice(MOVES)
+                for lib, game in zip(engines, games): lib.Game_update_car(game, i, ax, ay)
+            assert car_states(engines[1], games[1], len(starts)) == car_states(engines[0], games[0], len(starts)), turn
+    finally:
+        for lib, game in zip(engines, games): lib.Game_delete(game)
+
+
+@pytest.mark.parametrize("n_walls", [20, 300])
+def test_wall_grid_matches_linear_scan(n_walls):
+    rng = np.random.default_rng(n_walls)
+    side = 120
+    x1, y1 = rng.integers(0, side, n_walls), rng.integers(0, side, n_walls)
+    x2 = np.clip(x1 + rng.integers(-15, 16, n_walls), 0, side - 1)
+    y2 = np.clip(y1 + rng.integers(-15, 16, n_walls), 0, side - 1)
+    track = Track(side, side)
+    for w in zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist()): track.add_wall(*w)
+    sx, sy = rng.integers(0, side, 3000), rng.integers(0, side, 3000)
+    ex, ey = sx + rng.integers(-6, 7, 3000), sy + rng.integers(-6, 7, 3000)
+
+    # Очікуване - перебір усіх стін для кожного руху
+    outside = (ex < 0) | (ex >= side) | (ey < 0) | (ey >= side)
+    expected = outside | segments_intersect(sx[:, None], sy[:, None], ex[:, None], ey[:, None], x1, y1, x2, y2).any(axis=1)
+    assert expected.any() and not expected.all()
+    assert track.is_collision_many(sx, sy, ex, ey, use_grid=True).tolist() == expected.tolist()
+    assert [track.is_collision(*m) for m in zip(sx.tolist(), sy.tolist(), ex.tolist(), ey.tolist())] == expected.tolist()
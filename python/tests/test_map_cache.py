@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pygame
+
+from racetrack import map_cache
+from racetrack.map_cache import load_map
+
+
+BG_SIZE, THUMB_SIZE = (320, 240), (80, 60)
+
+
+def write_map(path, image):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"SIZE 32 24\nIMAGE {image}\nSTART 2 10 4 2\nFINISH 26 10 4 2\n")
+        f.write("WALL 0 0 32 0\nWALL 0 24 32 24\nWALL 10 5 10 20\n")
+
+
+def save_image(path, size=(64, 48)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    surf = pygame.Surface(size)
+    surf.fill((20, 120, 40))
+    pygame.image.save(surf, path)
+
+
+def count_compiles(monkeypatch):
+    calls = []
+    compile_map = map_cache.compile_map
+    def counted(*args):
+        calls.append(args)
+        return compile_map(*args)
+    monkeypatch.setattr(map_cache, "compile_map", counted)
+    return calls
+
+
+def check_reused(tmp_path, monkeypatch, image):
+    save_image(str(tmp_path / image))
+    map_path = str(tmp_path / "map.txt")
+    write_map(map_path, image)
+    calls = count_compiles(monkeypatch)
+    first = load_map(map_path, BG_SIZE, THUMB_SIZE)
+    second = load_map(map_path, BG_SIZE, THUMB_SIZE)
+    # Друге завантаження - з кешу, без компіляції
+    assert len(calls) == 1
+    assert second.has_image and second.size == (32, 24)
+    assert second.walls.tolist() == first.walls.tolist()
+    assert np.array_equal(second.background, first.background)
+    assert np.array_equal(second.thumbnail, first.thumbnail)
+
+
+def test_second_load_reuses_cache(tmp_path, monkeypatch):
+    check_reused(tmp_path, monkeypatch, "map.png")
+
+
+def test_long_image_path_reuses_cache(tmp_path, monkeypatch):
+    image = os.path.join("a" * 120, "b" * 120, "c" * 120, "map.png")
+    check_reused(tmp_path, monkeypatch, image)
+
+
+def test_changed_image_recompiles(tmp_path, monkeypatch):
+    save_image(str(tmp_path / "map.png"))
+    map_path = str(tmp_path / "map.txt")
+    write_map(map_path, "map.png")
+    calls = count_compiles(monkeypatch)
+    load_map(map_path, BG_SIZE, THUMB_SIZE)
+    save_image(str(tmp_path / "map.png"), (100, 80))
+    os.utime(tmp_path / "map.png", ns=(1, 1))
+    load_map(map_path, BG_SIZE, THUMB_SIZE)
+    load_map(map_path, (640, 480), THUMB_SIZE)
+    assert len(calls) == 3
@@ -0,0 +1,74 @@
+import os
+import random
+
+import pytest
+
+from racetrack.api import CRASHED, PLAYING
+from racetrack.numpy_engine import NumpyEngine
+from racetrack.race import Race, MOVE, SKIP, RESPAWN
+from racetrack.replay import RaceRecorder, file_sha1, load_replay_track, read_replay, run_replay
+from racetrack.track_file import read_track
+
+
+maps_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "maps")
+
+MOVES = [(ax, ay) for ay in (-1, 0, 1) for ax in (-1, 0, 1)]
+
+
+def record_race(path, map_id, players, seed, max_turns=500):
+    # Випадкові ходи; розбита машина то пропускає хід, то одразу повертається на старт
+    map_path = os.path.join(maps_dir, f"track{map_id}.txt")
+    track = read_track(map_path)
+    colors = [(3 * i + 1) % 4 for i in range(players)]
+    size = track.size or (32, 24)
+    race = Race(NumpyEngine(), track, colors, size)
+    race.recorder = RaceRecorder(path, map_id, file_sha1(map_path), size, race.start_positions, colors)
+    rng = random.Random(seed)
+    for _ in range(max_turns):
+        if race.winner != -1: break
+        i = race.current_player
+        if race.car(i).state == CRASHED:
+            if rng.random() < 0.5:
+                race.skip_turn()
+                continue
+            race.respawn(i)
+        race.play(*rng.choice(MOVES))
+    starts = race.start_positions
+    race.close()
+    return starts, colors
+
+
+@pytest.mark.parametrize("map_id", [1, 2])
+def test_replay_round_trip(tmp_path, map_id):
+    path = str(tmp_path / "race.rtr")
+    starts, colors = record_race(path, map_id, 3, seed=3)
+    replay = read_replay(path)
+    assert replay.map_id == map_id and replay.starts == starts and replay.colors == colors
+    kinds = {e[1] for e in replay.events}
+    assert {MOVE, SKIP, RESPAWN} <= kinds
+    # Респавн записує справжній стан машини на старті
+    for ms, kind, player, ax, ay, x, y, vx, vy, state in replay.events:
+        if kind == RESPAWN: assert (x, y, vx, vy, state) == (*starts[player], 0, 0, PLAYING)
+
+    turns, mismatches = run_replay(NumpyEngine(), replay, load_replay_track(replay, maps_dir))
+    assert turns == replay.turns > 0
+    assert mismatches == []
+
+
+def test_truncated_replay_drops_partial_event(tmp_path):
+    path = str(tmp_path / "race.rtr")
+    record_race(path, 1, 2, seed=7, max_turns=50)
+    full = read_replay(path)
+    with open(path, "rb") as f: data = f.read()
+    with open(path, "wb") as f: f.write(data[:-3])
+    replay = read_replay(path)
+    assert replay.events == full.events[:-1]
+    assert run_replay(NumpyEngine(), replay, load_replay_track(replay, maps_dir))[1] == []
+
+
+def test_changed_map_is_rejected(tmp_path):
+    path = str(tmp_path / "race.rtr")
+    record_race(path, 1, 2, seed=3, max_turns=20)
+    replay = read_replay(path)
+    replay.map_sha1 = b"\0" * 20
+    with pytest.raises(ValueError): load_replay_track(replay, maps_dir)
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import random
+
+from racetrack.api import CRASHED, PLAYING
+from racetrack.numpy_engine import NumpyEngine
+from racetrack.server import (DELTA, ERROR, ERROR_MSG, ERR_INTERNAL, ERR_LIMIT, ERR_MAP, ERR_PROTOCOL, ERR_TURN,
+                              FRAME, MAX_CARS, MOVE, MOVE_MSG, OPEN, OPEN_MSG, OPENED, OPENED_MSG, SESSION_MSG, STATE,
+                              WATCH, Connection, RaceServer, TimerWheel, decode_state, encode_state, frame, split_frames)
+
+
+maps_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "maps")
+
+
+def test_split_frames_keeps_partial_message():
+    bodies = [b"\x01abc", b"", b"\x02" * 300]
+    data = b"".join(frame(b) for b in bodies)
+    buf = bytearray(data[:-5])
+    assert split_frames(buf) == bodies[:2]
+    assert len(buf) == FRAME.size + 300 - 5
+    buf += data[-5:]
+    assert split_frames(buf) == bodies[2:]
+    assert buf == bytearray()
+
+
+def test_state_round_trip():
+    cars = [(0, (5, 15, 0, 0, PLAYING)), (3, (-4, 300, -2, 7, CRASHED)), (200, (0, 0, 0, 0, PLAYING))]
+    for winner in (-1, 0, 200):
+        msg = encode_state(DELTA, 123456, 70000, 201, winner, cars)
+        body = split_frames(bytearray(msg))[0]
+        assert decode_state(body) == (DELTA, 123456, 70000, 201, winner, [(i, *c) for i, c in cars])
+
+
+def test_timer_wheel_fires_each_item_once_and_never_early():
+    rng = random.Random(1)
+    wheel = TimerWheel(resolution=0.05, slots=16, now=100.0)
+    due_at = {}
+    now = 100.0
+    fired = {}
+    while now < 112.0:
+        for _ in range(rng.randrange(4)):
+            # Частина таймерів - далі ніж на оберт колеса (16 * 0.05 с)
+            item = len(due_at)
+            due_at[item] = now + rng.uniform(0.0, 3.0)
+            wheel.schedule(due_at[item], item)
+        now += rng.uniform(0.001, 0.2)
+        for item in wheel.advance(now):
+            assert item not in fired and due_at[item] <= now
+            fired[item] = now
+    now += 3.5
+    for item in wheel.advance(now): fired[item] = now
+    assert sorted(fired) == sorted(due_at) and wheel.count == 0
+    # Спрацьовує в першому advance після свого часу, пропущених немає
+    late = [fired[i] - due_at[i] for i in fired if due_at[i] < 112.0 - 0.3]
+    assert max(late) <= 0.2 + 0.05
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    def send(self, *bodies):
+        self.writer.write(b"".join(frame(b) for b in bodies))
+
+    async def recv(self):
+        (n,) = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+        return await self.reader.readexactly(n)
+
+    async def open(self, request, map_id=1, cars=2):
+        self.send(OPEN_MSG.pack(OPEN, request, map_id, cars))
+        kind, got, sid = OPENED_MSG.unpack(await self.recv())
+        assert (kind, got) == (OPENED, request)
+        state = decode_state(await self.recv())
+        assert state[:2] == (STATE, sid)
+        return sid, state
+
+
+def run_server(test, **options):
+    async def main():
+        server = RaceServer(NumpyEngine(), maps_dir, respawn_delay=0.2, resolution=0.02, **options)
+        server.loop = asyncio.get_running_loop()
+        listener = await server.loop.create_server(lambda: Connection(server), "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        clients = []
+
+        async def connect():
+            clients.append(Client(*await asyncio.open_connection("127.0.0.1", port)))
+            return clients[-1]
+        try:
+            await asyncio.wait_for(test(server, connect), 10)
+        finally:
+            for c in clients: c.writer.close()
+            listener.close()
+            await listener.wait_closed()
+    asyncio.run(main())
+
+
+def test_open_move_and_errors():
+    async def test(server, connect):
+        a, b = await connect(), await connect()
+        sid, state = await a.open(7)
+        assert state[2:5] == (0, 0, -1) and [c[0] for c in state[5]] == [0, 1]
+
+        a.send(OPEN_MSG.pack(OPEN, 8, 99, 2), OPEN_MSG.pack(OPEN, 9, 1, 0), OPEN_MSG.pack(OPEN, 10, 1, MAX_CARS + 1),
+               OPEN_MSG.pack(OPEN, 11, 2, 12), b"\x09")
+        errors = [ERROR_MSG.unpack(await a.recv()) for _ in range(5)]
+        assert errors == [(ERROR, 0, 8, ERR_MAP), (ERROR, 0, 9, ERR_PROTOCOL), (ERROR, 0, 10, ERR_PROTOCOL),
+                          (ERROR, 0, 11, ERR_PROTOCOL), (ERROR, 0, 0, ERR_PROTOCOL)]
+
+        # Другий клієнт підписується й бачить хід першого
+        b.send(SESSION_MSG.pack(WATCH, sid))
+        assert decode_state(await b.recv())[:2] == (STATE, sid)
+        a.send(MOVE_MSG.pack(MOVE, sid, 1, 0, 0))
+        assert ERROR_MSG.unpack(await a.recv()) == (ERROR, sid, 0, ERR_TURN)
+        a.send(MOVE_MSG.pack(MOVE, sid, 0, 1, 0))
+        for c in (a, b):
+            kind, got, turn, current, winner, cars = decode_state(await c.recv())
+            assert (kind, got, turn, current, winner) == (DELTA, sid, 1, 1, -1)
+            assert [(i, vx, vy) for i, x, y, vx, vy, st in cars] == [(0, 1, 0)]
+        assert server.stats["moves"] == 1
+    run_server(test)
+
+
+def test_crashed_car_respawns_on_timer():
+    async def test(server, connect):
+        a = await connect()
+        sid, state = await a.open(1)
+        start = state[5][0][1:3]
+        # Машина 0 розганяється вниз до стіни, машина 1 стоїть
+        for _ in range(12):
+            a.send(MOVE_MSG.pack(MOVE, sid, 0, 0, 1))
+            cars = decode_state(await a.recv())[5]
+            if cars and cars[0][5] == CRASHED: break
+            a.send(MOVE_MSG.pack(MOVE, sid, 1, 0, 0))
+            await a.recv()
+        assert cars[0][5] == CRASHED
+        kind, _, _, current, _, cars = decode_state(await a.recv())
+        assert kind == DELTA and cars == [(0, *start, 0, 0, PLAYING)]
+        assert server.stats["respawns"] == 1
+    run_server(test)
+
+
+def test_session_limits():
+    async def test(server, connect):
+        a, b = await connect(), await connect()
+        await a.open(1)
+        await a.open(2)
+        a.send(OPEN_MSG.pack(OPEN, 3, 1, 2))
+        assert ERROR_MSG.unpack(await a.recv()) == (ERROR, 0, 3, ERR_LIMIT)
+        await b.open(4)
+        b.send(OPEN_MSG.pack(OPEN, 5, 1, 2))
+        assert ERROR_MSG.unpack(await b.recv()) == (ERROR, 0, 5, ERR_LIMIT)
+        assert len(server.sessions) == 3
+    run_server(test, max_sessions=3, conn_sessions=2)
+
+
+def test_failing_session_does_not_drop_the_batch(capsys):
+    async def test(server, connect):
+        a = await connect()
+        bad, _ = await a.open(1)
+        good, _ = await a.open(2)
+
+        def broken(ax, ay): raise RuntimeError("engine failure")
+        server.sessions[bad].race.play = broken
+        a.send(MOVE_MSG.pack(MOVE, bad, 0, 1, 0), MOVE_MSG.pack(MOVE, good, 0, 1, 0))
+        assert ERROR_MSG.unpack(await a.recv()) == (ERROR, bad, 0, ERR_INTERNAL)
+        assert decode_state(await a.recv())[:3] == (DELTA, good, 1)
+        assert server.stats["failed"] == 1
+    run_server(test)
+    assert "engine failure" in capsys.readouterr().err
@@ -0,0 +1,34 @@
+import pytest
+
+from racetrack.trail import Trail
+
+
+PATH = [(3, 4), (4, 4), (5, 4), (5, 4), (7, 4), (7, 6), (8, 7), (9, 8), (8, 7), (8, 7), (-2, 30000)]
+
+
+def test_full_trail_keeps_every_point():
+    trail = Trail(2, 4)
+    for x, y in PATH: trail.append(x, y)
+    assert list(trail) == [(2, 4)] + PATH
+    assert len(trail) == len(PATH) + 1
+    assert trail[-1] == (-2, 30000) and trail[0] == (2, 4)
+    assert trail.as_array().tolist() == [[2, 4]] + [list(p) for p in PATH]
+    with pytest.raises(IndexError): trail[len(PATH) + 1]
+
+
+def test_simplified_trail_keeps_turns_only():
+    trail = Trail(2, 4, simplify=True)
+    for x, y in PATH: trail.append(x, y)
+    # Прямі (2,4)->(7,4) і (7,6)->(9,8) стискаються до кінців, повтори відкидаються,
+    # розворот назад (9,8)->(8,7) лишається окремою точкою
+    assert list(trail) == [(2, 4), (7, 4), (7, 6), (9, 8), (8, 7), (-2, 30000)]
+
+
+def test_reset_starts_a_new_trail():
+    trail = Trail(1, 1, simplify=True)
+    for x, y in PATH: trail.append(x, y)
+    trail.reset(6, 5)
+    assert list(trail) == [(6, 5)]
+    trail.append(6, 5)
+    trail.append(7, 5)
+    assert list(trail) == [(6, 5), (7, 5)]